@@ -0,0 +1,94 @@
+"""Compare BMP crop paths on full-size camera frames.
+
+    python benchmarks/bench_bmp_crop.py --width 2448 --height 2048 --frames 20
+
+For every bit depth it writes synthetic frames to a temp folder, checks that
+BmpRegionReader produces the same pixels as PIL (including top-down files and
+boxes hanging off the edge), then times:
+
+  pil-per-crop   Image.open(...).crop(...).save() per box (old crop_image loop)
+  pil-per-frame  one Image.open per frame, all boxes cut from it
+  mmap           crop.crop_many() through BmpRegionReader
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image  # noqa: E402
+
+from crop import BmpRegionReader, _crop_many_pil, crop_many  # noqa: E402
+from synth import write_bmp  # noqa: E402
+
+
+def boxes_for(width, height, n, w=150, h=200):
+    step = max((width - w) // max(n - 1, 1), 1)
+    return [(i * step, height // 2 - h // 2, i * step + w, height // 2 + h // 2) for i in range(n)]
+
+
+def check_equal(tmp, bpp):
+    edge_boxes = [(-20, -30, 130, 170), (90, 60, 260, 260), (10, 10, 160, 210)]
+    for top_down in (False, True):
+        src = os.path.join(tmp, f"check_{bpp}_{int(top_down)}.bmp")
+        write_bmp(src, 251, 203, bpp, top_down=top_down, seed=bpp)
+        with BmpRegionReader(src) as reader, Image.open(src) as img:
+            for i, box in enumerate(edge_boxes):
+                out = os.path.join(tmp, f"check_out_{i}.bmp")
+                reader.save_region(box, out)
+                with Image.open(out) as got:
+                    want = img.crop(box)
+                    if got.size != want.size or got.convert("RGB").tobytes() != want.convert("RGB").tobytes():
+                        raise SystemExit(f"mismatch: {bpp}-bit top_down={top_down} box={box}")
+
+
+def timed(fn, frames, boxes, out_dir):
+    start = time.perf_counter()
+    for src in frames:
+        fn(src, [(os.path.join(out_dir, f"{i}_{os.path.basename(src)}"), b) for i, b in enumerate(boxes)])
+    return time.perf_counter() - start
+
+
+def pil_per_crop(src, crops):
+    for out, box in crops:
+        with Image.open(src) as img:
+            img.crop(box).save(out)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--width", type=int, default=2448)
+    p.add_argument("--height", type=int, default=2048)
+    p.add_argument("--frames", type=int, default=20)
+    p.add_argument("--crops", type=int, default=9, help="boxes per frame")
+    p.add_argument("--bpp", default="8,24,32", help="comma-separated bit depths")
+    args = p.parse_args(argv)
+
+    boxes = boxes_for(args.width, args.height, args.crops)
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = os.path.join(tmp, "out")
+        os.makedirs(out_dir)
+        print(f"{args.frames} frames of {args.width}x{args.height}, {args.crops} crops each")
+        for bpp in (int(b) for b in args.bpp.split(",")):
+            check_equal(tmp, bpp)
+            frames = []
+            for n in range(args.frames):
+                path = os.path.join(tmp, f"frame_{bpp}_{n}.bmp")
+                write_bmp(path, args.width, args.height, bpp, seed=n)
+                frames.append(path)
+            results = [
+                ("pil-per-crop", timed(pil_per_crop, frames, boxes, out_dir)),
+                ("pil-per-frame", timed(_crop_many_pil, frames, boxes, out_dir)),
+                ("mmap", timed(crop_many, frames, boxes, out_dir)),
+            ]
+            base = results[0][1]
+            for name, secs in results:
+                print(f"  {bpp:2d}-bit {name:14s} {secs * 1000 / args.frames:8.2f} ms/frame  x{base / secs:5.1f}")
+            for path in frames:
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Python vs NumPy classification engines on a synthetic export.
+
+    python benchmarks/bench_columnar.py --rows 1000000
+
+Writes a FastForward-style export to a temp folder, runs run_analysis() with
+engine="python" and engine="numpy" (no crops, no move/copy), checks that both
+produce the same verdicts and area statistics, and prints the timings.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ff_analysis import AnalysisOptions, run_analysis  # noqa: E402
+from ff_columnar import numpy_available  # noqa: E402
+from synth import write_export  # noqa: E402
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--save-passed", action="store_true", help="also compute passed categories")
+    args = p.parse_args(argv)
+    if not numpy_available():
+        raise SystemExit("NumPy is not installed; the columnar engine is unavailable.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_dir = os.path.join(tmp, "csv")
+        os.makedirs(csv_dir)
+        path = os.path.join(csv_dir, "FastForward_N123_cam1.csv")
+        start = time.perf_counter()
+        write_export(path, args.rows)
+        print(f"wrote {args.rows:,} rows ({os.path.getsize(path) / 1e6:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+        results = {}
+        for engine in ("python", "numpy"):
+            opts = AnalysisOptions(path, extract_crops=False, save_passed=args.save_passed, engine=engine,
+                                   result_cache=False, history=False)
+            start = time.perf_counter()
+            results[engine] = run_analysis(opts)
+            secs = time.perf_counter() - start
+            print(f"  {engine:6s} {secs:7.2f}s  {args.rows / secs:12,.0f} rows/s")
+
+        a, b = results["python"], results["numpy"]
+        same = (a.failed, a.passed, a.images, a.expected_max, a.area, a.area_by_model, a.area_histogram) == \
+               (b.failed, b.passed, b.images, b.expected_max, b.area, b.area_by_model, b.area_histogram)
+        print(f"  results identical: {same} (under-max {len(a.failed):,}, images {a.images:,})")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Stage-by-stage benchmark of the analysis pipeline on synthetic data.
+
+    python benchmarks/bench_pipeline.py --rows 20000 --json results.json
+    python benchmarks/bench_pipeline.py --rows 20000 --compare results.json
+
+Generates a FastForward export (see synth.py) and a matching folder of
+full-size BMP frames on a temp filesystem, then times each stage on its own:
+
+  parse        csv tokenizing of the export (open_export)
+  classify     per-image tallies and verdicts (tally_row / classify_images)
+  area         blob-area statistics (parse_blob_area / AreaStats)
+  crops        per-blob crop extraction on the crop pool
+  copy, move   transfer of the failed (and with --save-passed, passed) images
+  run[engine]  run_analysis() end to end, analyze only, without crops
+
+Results are printed as a table and, with --json, written as JSON (one object
+with the environment, the parameters and a list of stages) so runs of two
+builds can be compared with --compare before a new EXE goes to the line.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from crop import CropGeometry, CropPool  # noqa: E402
+from ff_analysis import (AnalysisOptions, blob_crops, classify_images, destination_dir,  # noqa: E402
+                         extract_model_from_name, open_export, parse_blob_area, run_analysis, tally_row, to_float)
+from ff_columnar import numpy_available  # noqa: E402
+from ff_stats import AreaStats  # noqa: E402
+from ff_transfer import DEFAULT_WORKERS, TransferJob, transfer_files  # noqa: E402
+from synth import FRAME_HEIGHT, FRAME_WIDTH, write_export, write_frames  # noqa: E402
+
+RESULT_VERSION = 1
+
+
+def _timed(fn, repeat=1):
+    """(best seconds, value of the last call)."""
+    best, value = None, None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        value = fn()
+        secs = time.perf_counter() - start
+        best = secs if best is None else min(best, secs)
+    return best, value
+
+
+def _stage(name, secs, items, unit, nbytes=None):
+    entry = {"stage": name, "seconds": round(secs, 6), "items": items, "unit": unit,
+             "items_per_s": round(items / secs, 1) if secs > 0 else None}
+    if nbytes is not None:
+        entry["bytes"] = nbytes
+        entry["mb_per_s"] = round(nbytes / secs / 1e6, 2) if secs > 0 else None
+    return entry
+
+
+def _usable(cols, row):
+    """Number of reported blobs for rows the engine crops and measures, else None (same guards as scan_export)."""
+    try:
+        int(cols.cell(row, cols.search_max))
+    except ValueError:
+        return None
+    val = to_float(cols.cell(row, cols.results))
+    return None if val != val else int(val)
+
+
+def parse(csv_path):
+    with open(csv_path, "r", newline="", encoding="utf-8", errors="ignore") as f:
+        cols, rows = open_export(f)
+        return cols, list(rows)
+
+
+def classify(cols, rows, base_model, opts):
+    tallies = {}
+    expected_max = opts.expected_max
+    for row in rows:
+        tally_row(tallies, cols, row, opts.save_passed)
+        try:
+            expected_max = int(cols.cell(row, cols.search_max))
+        except ValueError:
+            pass
+    return classify_images(tallies, expected_max, base_model, opts.separate_by_model, opts.save_passed)
+
+
+def area(cols, rows, opts):
+    stats = AreaStats(exact=opts.area_exact, bin_width=opts.area_bin_width)
+    for row in rows:
+        n = _usable(cols, row)
+        if n is not None:
+            parse_blob_area(n, cols, row, stats)
+    stats.summary()
+    stats.by_model()
+    stats.histogram()
+    return len(stats)
+
+
+def crops(cols, rows, crop_dir, opts):
+    models = set()
+    with CropPool(opts.crop_workers) as pool:
+        for row in rows:
+            n = _usable(cols, row)
+            if n:
+                pool.submit(*blob_crops(n, cols, row, crop_dir, opts.crop_geometry, models))
+        return pool.close()
+
+
+def transfer_jobs(img_dir, dst_root, under_max, passed, opts):
+    jobs = []
+    for name, _, model in under_max:
+        jobs.append(TransferJob(os.path.join(img_dir, name), destination_dir(dst_root, "bench", model,
+                                                                             opts.separate_by_model), name))
+    for name, _, model, cat in passed:
+        jobs.append(TransferJob(os.path.join(img_dir, name), destination_dir(dst_root, "bench", model,
+                                                                             opts.separate_by_model, cat), name))
+    return jobs
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                             timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment():
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+           "commit": git_commit(), "frozen": bool(getattr(sys, "frozen", False))}
+    for mod in ("numpy", "PIL"):
+        try:
+            env[mod] = __import__(mod).__version__
+        except ImportError:
+            env[mod] = None
+    return env
+
+
+def run(args, tmp):
+    csv_dir = os.path.join(tmp, "csv")
+    img_dir = os.path.join(tmp, "images")
+    os.makedirs(csv_dir)
+    csv_path = os.path.join(csv_dir, "FastForward_N123_cam1.csv")
+    images = write_export(csv_path, args.rows, blobs=args.blobs, rows_per_image=args.rows_per_image,
+                          fail_rate=args.fail_rate, seed=args.seed, image_dir=img_dir, frame_width=args.width)
+    frame_bytes = 0
+    if args.frames:
+        frame_bytes = write_frames(img_dir, images, args.width, args.height, args.bpp, args.distinct_frames)
+    opts = AnalysisOptions(csv_path, save_passed=args.save_passed, separate_by_model=args.separate_by_model,
+                           crop_workers=args.crop_workers, transfer_workers=args.workers,
+                           area_exact=args.area_stats == "exact", crop_geometry=CropGeometry())
+    base_model = extract_model_from_name(os.path.basename(csv_path), "Unknown")
+    csv_bytes = os.path.getsize(csv_path)
+    stages = []
+
+    secs, (cols, rows) = _timed(lambda: parse(csv_path), args.repeat)
+    stages.append(_stage("parse", secs, len(rows), "rows", csv_bytes))
+    secs, (under_max, passed) = _timed(lambda: classify(cols, rows, base_model, opts), args.repeat)
+    stages.append(_stage("classify", secs, len(rows), "rows"))
+    secs, blobs = _timed(lambda: area(cols, rows, opts), args.repeat)
+    stages.append(_stage("area", secs, blobs, "blobs"))
+
+    if args.frames:
+        crop_dir = os.path.join(tmp, "crops")
+        secs, written = _timed(lambda: crops(cols, rows, crop_dir, opts))
+        stages.append(_stage("crops", secs, written, "crops"))
+        frame_size = frame_bytes // images if images else 0
+        for mode in ("copy", "move"):  # move last: it empties the image folder
+            jobs = transfer_jobs(img_dir, os.path.join(tmp, mode), under_max, passed, opts)
+            secs, outcomes = _timed(lambda: transfer_files(jobs, mode=mode, workers=opts.transfer_workers))
+            done = sum(1 for o in outcomes if o and o[0] in ("moved", "copied"))
+            stages.append(_stage(mode, secs, done, "files", done * frame_size if mode == "copy" else None))
+    del rows
+
+    for engine in ("python", "numpy") if numpy_available() else ("python",):
+        e2e = AnalysisOptions(csv_path, extract_crops=False, save_passed=args.save_passed,
+                              separate_by_model=args.separate_by_model, area_exact=opts.area_exact, engine=engine,
+                              result_cache=False, history=False)
+        secs, result = _timed(lambda: run_analysis(e2e), args.repeat)
+        stages.append(_stage(f"run[{engine}]", secs, result.total_rows, "rows", csv_bytes))
+
+    params = {k: getattr(args, k) for k in ("rows", "rows_per_image", "blobs", "fail_rate", "seed", "width",
+                                             "height", "bpp", "frames", "save_passed", "separate_by_model",
+                                             "area_stats", "crop_workers", "workers", "repeat")}
+    params.update(images=images, under_max=len(under_max), passed=len(passed), csv_bytes=csv_bytes)
+    return {"version": RESULT_VERSION, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(), "params": params, "stages": stages}
+
+
+def format_table(results, base=None):
+    base_secs = {s["stage"]: s["seconds"] for s in base["stages"]} if base else {}
+    lines = []
+    for s in results["stages"]:
+        rate = f"{s['items_per_s']:14,.0f} {s['unit']}/s" if s["items_per_s"] is not None else ""
+        mb = f" {s['mb_per_s']:8.1f} MB/s" if s.get("mb_per_s") is not None else ""
+        line = f"  {s['stage']:14s} {s['seconds']:9.3f}s {s['items']:>10,} {rate}{mb}"
+        if s["stage"] in base_secs and s["seconds"] > 0:
+            line += f"   x{base_secs[s['stage']] / s['seconds']:.2f} vs base"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=20_000)
+    p.add_argument("--rows-per-image", type=int, default=2)
+    p.add_argument("--blobs", type=int, default=9)
+    p.add_argument("--fail-rate", type=float, default=0.05, help="share of rows with fewer blobs than expected")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--width", type=int, default=FRAME_WIDTH)
+    p.add_argument("--height", type=int, default=FRAME_HEIGHT)
+    p.add_argument("--bpp", type=int, choices=(8, 24, 32), default=8)
+    p.add_argument("--distinct-frames", type=int, default=8, help="frames actually written; the rest are hard links")
+    p.add_argument("--no-frames", dest="frames", action="store_false", help="skip BMPs and the crops/copy/move stages")
+    p.add_argument("--save-passed", action="store_true")
+    p.add_argument("--separate-by-model", action="store_true")
+    p.add_argument("--area-stats", choices=("exact", "streaming"), default="exact")
+    p.add_argument("--crop-workers", type=int, default=None)
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="transfer threads")
+    p.add_argument("--repeat", type=int, default=1, help="best of N for the read-only stages")
+    p.add_argument("--tmp", default=None, help="folder for the generated data (default: system temp)")
+    p.add_argument("--json", metavar="PATH", help="write the results as JSON (- for stdout)")
+    p.add_argument("--compare", metavar="PATH", help="earlier --json output to compare against")
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.tmp) as tmp:
+        results = run(args, tmp)
+    base = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    out = sys.stderr if args.json == "-" else sys.stdout
+    params = results["params"]
+    out.write(f"{params['rows']:,} rows, {params['images']:,} images, {params['under_max']:,} under-max "
+              f"({results['environment']['commit'] or 'unknown build'})\n")
+    out.write(format_table(results, base))
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Startup time of the GUI: import cost and time to the first window.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --exe dist/ff_blob_checker_gui.exe --repeat 5 --json startup.json
+
+Two measurements:
+
+  imports       `python -X importtime` of the GUI module (what runs before the
+                window can appear) and of ff_analysis (loaded in the background
+                afterwards); the slowest modules are listed so a new top-level
+                import shows up immediately
+  first window  the app is launched (script, or the PyInstaller EXE with --exe)
+                with FF_BLOB_STARTUP_PROBE set; it records when its window is
+                mapped and when the engine has finished loading, then exits.
+                Times are measured from the launch, so they include interpreter
+                start-up and, for a --onefile EXE, unpacking.
+
+The import measurement needs the sources; with --exe only the window timing runs.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    """(total seconds, [(cumulative seconds, module), ...] slowest first) for importing module."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    entries = []
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        micros = int(cumulative)
+        entries.append((micros / 1e6, name.strip()))
+        if not name.startswith("  "):  # top level: its cumulative time includes everything below it
+            total += micros
+    entries.sort(reverse=True)
+    return total / 1e6, entries
+
+
+def first_window(command, timeout):
+    """(seconds to the first window, seconds until the engine is loaded) for one launch."""
+    fd, probe = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.remove(probe)
+    env = dict(os.environ, FF_BLOB_STARTUP_PROBE=probe)
+    try:
+        start = time.time()
+        subprocess.run(command, cwd=ROOT, env=env, timeout=timeout, check=True)
+        with open(probe, "r", encoding="utf-8") as f:
+            times = json.load(f)
+    finally:
+        if os.path.exists(probe):
+            os.remove(probe)
+    return times["first_window"] - start, times["engine_ready"] - start
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--exe", help="packaged build to launch instead of ff_blob_checker_gui.py")
+    p.add_argument("--repeat", type=int, default=3, help="launches to time (median is reported)")
+    p.add_argument("--timeout", type=float, default=60.0, help="seconds before a launch counts as hung")
+    p.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    p.add_argument("--no-window", dest="window", action="store_false", help="only measure imports (no display needed)")
+    p.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    args = p.parse_args(argv)
+
+    results = {"python": sys.version.split()[0], "platform": sys.platform, "exe": args.exe}
+    if not args.exe:
+        for module in ("ff_blob_checker_gui", "ff_analysis"):
+            total, entries = import_times(module)
+            results[f"import_{module}_s"] = round(total, 4)
+            print(f"import {module}: {total * 1000:.1f} ms")
+            for secs, name in entries[:args.top]:
+                print(f"  {secs * 1000:8.1f} ms  {name}")
+
+    if args.window:
+        command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, os.path.join(ROOT, "ff_blob_checker_gui.py")]
+        runs = [first_window(command, args.timeout) for _ in range(max(args.repeat, 1))]
+        window = statistics.median(r[0] for r in runs)
+        ready = statistics.median(r[1] for r in runs)
+        results.update(first_window_s=round(window, 4), engine_ready_s=round(ready, 4),
+                       runs=[[round(a, 4), round(b, 4)] for a, b in runs])
+        print(f"first window: {window * 1000:.0f} ms, engine loaded: {ready * 1000:.0f} ms "
+              f"(median of {len(runs)} launches)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Synthetic FastForward exports and BMP frames for the benchmarks.
+
+write_export() writes a ;-delimited export with the metadata first line,
+BlobNumSearchMax / BlobNumResults and BlobArea0N / ModelNumber0N /
+BlobPositionX0N for N blobs. write_frames() puts a matching full-size BMP
+next to every image name; only a few distinct frames are written and the
+rest are hard links, so 100k images do not need 100k x 5 MB of disk.
+"""
+import os
+import random
+import shutil
+import struct
+
+FRAME_WIDTH = 2448
+FRAME_HEIGHT = 2048
+
+
+def image_name(n):
+    return f"img_{n:07d}.bmp"
+
+
+def write_export(path, rows, blobs=9, rows_per_image=2, fail_rate=0.05, seed=0, image_dir="C:\\images",
+                 frame_width=FRAME_WIDTH):
+    """Write rows for rows // rows_per_image images; about fail_rate of the rows find fewer than `blobs` blobs.
+
+    Returns the number of distinct images.
+    """
+    rnd = random.Random(seed)
+    header = ["ImageName", "ImageDirectory", "BlobNumSearchMax", "BlobNumResults"]
+    for i in range(blobs):
+        header += [f"BlobArea0{i + 1}", f"ModelNumber0{i + 1}", f"BlobPositionX0{i + 1}"]
+    # BlobPositionX is in 1/100 px; keep the crop centre inside the frame
+    pos_lo, pos_hi = 100 * 100, max(frame_width - 100, 101) * 100
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("FastForward export;synthetic\n")
+        f.write(";".join(header) + "\n")
+        for r in range(rows):
+            found = blobs if rnd.random() > fail_rate else rnd.randint(0, blobs - 1)
+            cells = [image_name(r // rows_per_image), image_dir, str(blobs), str(found)]
+            for i in range(blobs):
+                if i < found:
+                    cells += [str(rnd.randint(800, 1500)), "1" if rnd.random() < 0.7 else "2",
+                              str(rnd.randint(pos_lo, pos_hi))]
+                else:
+                    cells += ["", "", ""]
+            f.write(";".join(cells) + "\n")
+    return (rows + rows_per_image - 1) // rows_per_image
+
+
+def write_bmp(path, width, height, bpp, top_down=False, seed=0):
+    """Write an uncompressed BI_RGB BMP with a deterministic pixel pattern."""
+    stride = ((width * bpp + 31) // 32) * 4
+    palette = b"".join(bytes((i, i, i, 0)) for i in range(256)) if bpp == 8 else b""
+    offset = 14 + 40 + len(palette)
+    row_len = width * bpp // 8
+    pattern = bytes((i * 7 + seed) & 0xFF for i in range(row_len + 256))
+    with open(path, "wb") as f:
+        f.write(struct.pack("<2sIHHI", b"BM", offset + stride * height, 0, 0, offset))
+        f.write(struct.pack("<IiiHHIIiiII", 40, width, -height if top_down else height, 1, bpp, 0,
+                            stride * height, 2835, 2835, 256 if bpp == 8 else 0, 0))
+        f.write(palette)
+        pad = bytes(stride - row_len)
+        for y in range(height):
+            start = (y * 13) % 256
+            f.write(pattern[start:start + row_len] + pad)
+
+
+def write_frames(image_dir, images, width=FRAME_WIDTH, height=FRAME_HEIGHT, bpp=8, distinct=8):
+    """Create image_dir/img_<n>.bmp for n in range(images). Returns the total bytes on disk (as seen by readers)."""
+    os.makedirs(image_dir, exist_ok=True)
+    sources = []
+    total = 0
+    for n in range(images):
+        path = os.path.join(image_dir, image_name(n))
+        if len(sources) < distinct:
+            write_bmp(path, width, height, bpp, seed=n)
+            sources.append(path)
+        else:
+            src = sources[n % len(sources)]
+            try:
+                os.link(src, path)
+            except OSError:  # no hard links on this filesystem
+                shutil.copyfile(src, path)
+        total += os.path.getsize(path)
+    return total
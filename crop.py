@@ -1,5 +1,11 @@
-from PIL import Image
 import os
+import mmap
+import struct
+from collections import deque
+from dataclasses import dataclass
+
+# PIL and the process pool are imported on first use: most runs never need PIL
+# (see crop_many) and the GUI should not pay for either at startup.
 
 def crop_image(input_path, output_path, box):
     """
@@ -14,6 +20,8 @@ def crop_image(input_path, output_path, box):
     Returns:
         bool: True if the operation was successful, False otherwise.
     """
+    from PIL import Image
+
     # Check if the input file exists
     if not os.path.exists(input_path):
         print(f"Error: The file at {input_path} was not found.")
@@ -28,7 +36,6 @@ def crop_image(input_path, output_path, box):
             
             # Save the new cropped image
             cropped_img.save(output_path)
-            print(f"Successfully cropped and saved the image to {output_path}")
             return True
 
     except IOError as e:
@@ -38,17 +45,301 @@ def crop_image(input_path, output_path, box):
         print(f"An unexpected error occurred: {e}")
         return False
 
+@dataclass
+class CropGeometry:
+    """
+    Size and placement of the per-blob crop boxes.
+
+    Blob positions in the FastForward export are scaled by pos_scale
+    (BlobPositionX01 = 12345 -> x = 123). When the export has no
+    BlobPositionY0N column, pos_y is used as the vertical centre.
+    """
+    width: int = 150
+    height: int = 200
+    pos_y: int = 490
+    pos_scale: int = 100
+
+    def box(self, pos_x, pos_y=None):
+        """Return the (left, upper, right, lower) box centred on the raw export position."""
+        x = int(pos_x / self.pos_scale)
+        y = self.pos_y if pos_y is None else int(pos_y / self.pos_scale)
+        return (x - self.width // 2, y - self.height // 2,
+                x + self.width - self.width // 2, y + self.height - self.height // 2)
+
+
+class UnsupportedBmp(Exception):
+    """The file is not a BMP that BmpRegionReader can slice directly."""
+
+
+class BmpRegionReader:
+    """
+    Reads rectangular regions straight out of an uncompressed BMP.
+
+    The file is memory-mapped and only the bytes inside a crop box are
+    copied, so a 150x200 crop from a full camera frame touches ~200 short
+    row slices instead of decoding the whole image. Handles bottom-up and
+    top-down row order, 8/24/32-bit BI_RGB pixels and row padding; anything
+    else (RLE, bitfields, 1/4/16-bit, ...) raises UnsupportedBmp so the
+    caller can fall back to PIL.
+
+    Args:
+        path (str): The file path of the BMP to read.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError) as e:  # empty file, unmappable share, ...
+            self._file.close()
+            raise UnsupportedBmp(str(e))
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        m = self._map
+        if len(m) < 54 or m[:2] != b"BM":
+            raise UnsupportedBmp("not a BMP file")
+        self.data_offset, = struct.unpack_from("<I", m, 10)
+        dib_size, = struct.unpack_from("<I", m, 14)
+        if dib_size < 40:
+            raise UnsupportedBmp("OS/2 BMP header")
+        width, height, _, bpp, compression = struct.unpack_from("<iiHHI", m, 18)
+        colors_used, = struct.unpack_from("<I", m, 46)
+        if compression != 0 or bpp not in (8, 24, 32) or width <= 0 or height == 0:
+            raise UnsupportedBmp(f"unsupported BMP ({bpp}-bit, compression {compression})")
+        self.width = width
+        self.height = abs(height)
+        self.top_down = height < 0
+        self.bpp = bpp
+        self.stride = ((width * bpp + 31) // 32) * 4
+        self.palette = b""
+        if bpp == 8:
+            count = colors_used or 256
+            start = 14 + dib_size
+            self.palette = bytes(m[start:start + 4 * count])
+        if self.data_offset + self.stride * self.height > len(m):
+            raise UnsupportedBmp("truncated pixel data")
+
+    def region(self, box):
+        """
+        Copies the pixels inside box.
+
+        Args:
+            box (tuple): (left, upper, right, lower) like PIL's crop(); parts
+                         outside the image are filled with zero bytes.
+
+        Returns:
+            tuple: (width, height, rows) with rows a list of top-down row
+                   bytes, unpadded.
+        """
+        return self._region(box, 0)
+
+    def _region(self, box, row_pad):
+        left, upper, right, lower = (int(round(v)) for v in box)
+        w, h = max(right - left, 0), max(lower - upper, 0)
+        px = self.bpp // 8
+        row_len = w * px
+        x0, x1 = max(left, 0), min(right, self.width)
+        y0, y1 = max(upper, 0), min(lower, self.height)
+        pad = bytes(row_pad)
+        blank = bytes(row_len) + pad
+        if x0 >= x1 or y0 >= y1:
+            return w, h, [blank] * h
+
+        m, stride = self._map, self.stride
+        n = (x1 - x0) * px
+        before, after = bytes((x0 - left) * px), bytes(row_len - (x0 - left) * px - n) + pad
+        if self.top_down:
+            first, step = self.data_offset + y0 * stride, stride
+        else:
+            first, step = self.data_offset + (self.height - 1 - y0) * stride, -stride
+        first += x0 * px
+        if before or after:
+            inside = [before + m[o:o + n] + after for o in range(first, first + step * (y1 - y0), step)]
+        else:
+            inside = [m[o:o + n] for o in range(first, first + step * (y1 - y0), step)]
+        return w, h, [blank] * (y0 - upper) + inside + [blank] * (lower - y1)
+
+    def save_region(self, box, output_path):
+        """
+        Writes the pixels inside box to output_path as a bottom-up BMP with
+        the same bit depth (and palette) as the source.
+        """
+        left, _, right, _ = (int(round(v)) for v in box)
+        w = max(right - left, 0)
+        out_stride = ((w * self.bpp + 31) // 32) * 4
+        w, h, rows = self._region(box, out_stride - w * (self.bpp // 8))
+        offset = 14 + 40 + len(self.palette)
+        size = offset + out_stride * h
+        header = struct.pack("<2sIHHI", b"BM", size, 0, 0, offset)
+        info = struct.pack("<IiiHHIIiiII", 40, w, h, 1, self.bpp, 0, out_stride * h,
+                           2835, 2835, len(self.palette) // 4, 0)
+        rows.reverse()
+        with open(output_path, "wb") as out:
+            out.write(b"".join([header, info, self.palette] + rows))
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _crop_many_pil(input_path, crops):
+    from PIL import Image
+
+    written = 0
+    try:
+        with Image.open(input_path) as img:
+            img.load()
+            for output_path, box in crops:
+                try:
+                    img.crop(box).save(output_path)
+                    written += 1
+                except Exception as e:
+                    print(f"An error occurred while writing {output_path}: {e}")
+    except IOError as e:
+        print(f"An error occurred while handling the image file: {e}")
+    return written
+
+
+def crop_many(input_path, crops):
+    """
+    Crops several areas from one image, decoding the source only once.
+
+    Uncompressed BMP sources with .bmp outputs go through BmpRegionReader;
+    everything else is decoded once with PIL.
+
+    Args:
+        input_path (str): The file path of the original image.
+        crops (list): (output_path, box) pairs, box as in crop_image().
+
+    Returns:
+        int: The number of crops that were written.
+    """
+    # Uncompressed BMP -> BMP crops are sliced straight from the mapped file. The source is
+    # opened without an exists() check first, which would cost a round trip on a share.
+    if all(out.lower().endswith(".bmp") for out, _ in crops):
+        try:
+            reader = BmpRegionReader(input_path)
+        except FileNotFoundError:
+            print(f"Error: The file at {input_path} was not found.")
+            return 0
+        except (UnsupportedBmp, OSError):
+            reader = None
+        if reader is not None:
+            written = 0
+            with reader:
+                for output_path, box in crops:
+                    try:
+                        reader.save_region(box, output_path)
+                        written += 1
+                    except Exception as e:
+                        print(f"An error occurred while writing {output_path}: {e}")
+            return written
+
+    if not os.path.exists(input_path):
+        print(f"Error: The file at {input_path} was not found.")
+        return 0
+    return _crop_many_pil(input_path, crops)
+
+
+class CropPool:
+    """
+    Runs crop_many() for many source images across a process pool.
+
+    Submissions are throttled so at most a few batches per worker are
+    pending, which keeps memory flat when fed from a streaming parse.
+    With workers <= 1 everything runs in the calling process.
+
+    An export has several rows per image, all cropping to the same output
+    paths. Consecutive submissions for one source image are merged into a
+    single job (the last row's box wins per output path), and a job whose
+    outputs overlap one still running waits for it, so crops are written in
+    submission order and never by two processes at once.
+
+    Args:
+        workers (int): Number of worker processes (default: CPU count).
+    """
+
+    def __init__(self, workers=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.written = 0
+        self._pending = deque()  # (future, output paths)
+        self._input = None       # source image of the job being merged
+        self._crops = {}         # its output path -> box
+        if self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._pool = None
+
+    def submit(self, input_path, crops):
+        if input_path != self._input:
+            self._flush()
+            self._input = input_path
+        self._crops.update(crops)
+
+    def _flush(self):
+        """Run or queue the merged job of the current source image."""
+        if self._input is None:
+            return
+        input_path, crops = self._input, list(self._crops.items())
+        self._input, self._crops = None, {}
+        if self._pool is None:
+            self.written += crop_many(input_path, crops)
+            return
+        outputs = {out for out, _ in crops}
+        while self._pending and (len(self._pending) >= self.workers * 4
+                                 or any(not outputs.isdisjoint(paths) for _, paths in self._pending)):
+            self.written += self._pending.popleft()[0].result()
+        self._pending.append((self._pool.submit(crop_many, input_path, crops), outputs))
+
+    def close(self, cancel=False):
+        """Wait for outstanding crops (or drop them if cancel) and return the total written."""
+        if cancel:
+            self._input, self._crops = None, {}
+        else:
+            self._flush()
+        if self._pool is not None:
+            if cancel:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+            else:
+                while self._pending:
+                    self.written += self._pending.popleft()[0].result()
+                self._pool.shutdown()
+            self._pool = None
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+
+
 if __name__ == "__main__":
     # --- Example Usage ---
     
     # First, let's create a dummy bitmap image to work with.
     # This is not part of the core function but makes the script
     # runnable out of the box.
+    from PIL import Image, ImageDraw
+
     try:
         dummy_img = Image.new('RGB', (200, 200), color='white')
         
         # Draw a red rectangle in the center for demonstration
-        from PIL import ImageDraw
         draw = ImageDraw.Draw(dummy_img)
         draw.rectangle([50, 50, 150, 150], fill="red")
         
@@ -0,0 +1,800 @@
+"""Headless analysis engine for FastForward CSV exports.
+
+Shared by the Tk app (ff_blob_checker_gui.py) and the command-line entry
+point (ff_blob_cli.py). Nothing in here imports tkinter, so it can run from
+a scheduled job or on a headless line PC.
+"""
+import os
+import re
+import csv
+import gc
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import astuple, dataclass, field
+
+from crop import CropGeometry, CropPool
+from ff_cache import file_digest, make_key, open_cache
+from ff_history import record_run
+from ff_index import ImageIndex, load_index
+from ff_metrics import TIMING_HEADER, RunMetrics
+from ff_stats import DEFAULT_BIN_WIDTH, AreaStats, AreaSummary
+from ff_journal import TransferJournal, journal_path
+from ff_transfer import DEFAULT_WORKERS, TransferJob, same_file, transfer_files
+
+
+class AnalysisError(Exception):
+    """Raised when an analysis cannot start (bad paths, bad settings, unreadable CSV)."""
+
+
+class AnalysisCancelled(AnalysisError):
+    """Raised when a run is cancelled before classification finished."""
+
+
+PROGRESS_EVERY = 1000  # rows between "parse" progress reports
+CROP_SAMPLES = 8  # crop files per model folder checked before a cached result skips crop extraction
+
+
+def to_float(val, default=float("nan")):
+    try:
+        return float(val)
+    except Exception:
+        return default
+
+
+def extract_model_from_name(name, fallback):
+    """Extract N### from a string, else fallback."""
+    if not name:
+        return fallback
+    m = re.search(r"N\d{3}", str(name))
+    return m.group(0) if m else fallback
+
+
+def parse_export_name(name):
+    """Split "FastForward_<recipe>_<camera>.csv" into (recipe, camera); other names give (stem, "")."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    m = re.match(r"FastForward_(.+)_([^_]+)$", stem, re.IGNORECASE)
+    return (m.group(1), m.group(2)) if m else (stem, "")
+
+
+def blob_column(prefix, i):
+    """Name of the per-blob column for zero-based blob i, e.g. ("BlobArea", 0) -> "BlobArea01"."""
+    return prefix + "0" + str(i + 1)
+
+
+class CsvColumns:
+    """Column indices resolved once from the export header, so rows can stay plain lists."""
+
+    def __init__(self, header):
+        self.header = header
+        self.index = {}
+        for i, name in enumerate(header):
+            self.index[name] = i  # last duplicate wins, like csv.DictReader
+        self.image = self.index.get("ImageName")
+        self.directory = self.index.get("ImageDirectory")
+        self.search_max = self.index.get("BlobNumSearchMax")
+        self.results = self.index.get("BlobNumResults")
+        self.area, self.model, self.pos_x, self.pos_y = [], [], [], []
+        while True:
+            i = len(self.area)
+            cols = [self.index.get(blob_column(p, i)) for p in ("BlobArea", "ModelNumber", "BlobPositionX", "BlobPositionY")]
+            if all(c is None for c in cols):
+                break
+            self.area.append(cols[0])
+            self.model.append(cols[1])
+            self.pos_x.append(cols[2])
+            self.pos_y.append(cols[3])
+        # every ModelNumber* column, used for the passed-image categories
+        self.model_labels = [i for name, i in self.index.items() if name.startswith("ModelNumber")]
+
+    @staticmethod
+    def cell(row, idx):
+        if idx is None or idx >= len(row):
+            return ""
+        return row[idx]
+
+
+def open_export(f):
+    """Skip the metadata line of an open export, read the header and return (CsvColumns, row iterator).
+
+    Rows are yielded lazily as lists of strings; blank lines are dropped.
+    """
+    _ = f.readline()  # skip metadata
+    reader = csv.reader(f, delimiter=";")
+    header = next(reader, [])
+    return CsvColumns(header), (row for row in reader if row)
+
+
+class ImageTally:
+    """Running per-image aggregate, so memory is bounded by distinct images rather than rows."""
+    __slots__ = ("count", "bad", "min_val", "max_val", "label")
+
+    def __init__(self):
+        self.count = 0          # non-empty BlobNumResults values seen
+        self.bad = False        # a non-numeric BlobNumResults was seen
+        self.min_val = None
+        self.max_val = None
+        self.label = None       # None, "1", "2" or "mixed" over all ModelNumber values
+
+    def add_result(self, val):
+        self.count += 1
+        if val != val:  # NaN
+            self.bad = True
+            return
+        if self.min_val is None or val < self.min_val:
+            self.min_val = val
+        if self.max_val is None or val > self.max_val:
+            self.max_val = val
+
+    def add_label(self, label):
+        if self.label is None:
+            self.label = label if label in ("1", "2") else "mixed"
+        elif self.label != label:
+            self.label = "mixed"
+
+    def category(self):
+        if self.label == "1":
+            return "1-top"
+        if self.label == "2":
+            return "2-bottom"
+        return "mixed"
+
+
+def tally_row(tallies, cols, row, with_labels):
+    """Fold one export row into the per-image tallies."""
+    img_name = cols.cell(row, cols.image)
+    if not img_name:  # skip rows with missing image name
+        return
+    t = tallies.get(img_name)
+    if t is None:
+        t = tallies[img_name] = ImageTally()
+    raw = cols.cell(row, cols.results)
+    if raw:
+        t.add_result(to_float(raw))
+    if with_labels:
+        for idx in cols.model_labels:
+            v = cols.cell(row, idx).strip()
+            if v:
+                t.add_label(v)
+
+
+def classify_tally(img, t, expected_max, base_model, separate_by_model):
+    """Verdict for one image: ("failed", (img, min, model)), ("passed", (img, expected_max, model, category)) or None."""
+    model = extract_model_from_name(img, base_model) if separate_by_model else ""
+    if t.min_val is not None and t.min_val < expected_max:
+        return "failed", (img, t.min_val, model)
+    if not t.bad and (t.count == 0 or t.min_val == t.max_val == expected_max):
+        return "passed", (img, expected_max, model, t.category())
+    return None
+
+
+def classify_images(tallies, expected_max, base_model, separate_by_model, save_passed):
+    """Turn per-image tallies into (under_max, passed) lists, in first-seen image order."""
+    under_max, passed = [], []
+    for img, t in tallies.items():
+        verdict = classify_tally(img, t, expected_max, base_model, separate_by_model)
+        if verdict is None:
+            continue
+        if verdict[0] == "failed":
+            under_max.append(verdict[1])
+        elif save_passed:
+            passed.append(verdict[1])
+    return under_max, passed
+
+
+def destination_dir(failed_dir, ts, model, separate_by_model, category=None, timestamped=True):
+    """failed_<ts> folder for a failed image, or passed_<ts>/<category> for a passed one.
+
+    With timestamped=False failed images go straight into failed_dir (and passed ones into
+    failed_dir/passed/<category>), which is how batch mode fills its aggregate tree.
+    """
+    base = os.path.join(failed_dir, model) if separate_by_model else failed_dir
+    if not timestamped:
+        return base if category is None else os.path.join(base, "passed", category)
+    if category is None:
+        return os.path.join(base, f"failed_{ts}")
+    return os.path.join(base, f"passed_{ts}", category)
+
+
+@dataclass
+class AnalysisOptions:
+    """Settings for one analysis run. Mirrors the controls of the Tk app."""
+    csv_path: str
+    img_src_dir: str = ""        # empty -> folder one level above the CSV
+    failed_dir: str = ""         # empty -> same folder as the CSV
+    expected_max: int = 9
+    action_mode: str = "move"    # "move" or "copy"
+    save_logs: bool = False
+    separate_by_model: bool = False
+    save_passed: bool = False
+    extract_crops: bool = True
+    execute: bool = False
+    transfer_workers: int = DEFAULT_WORKERS
+    crop_workers: int = None     # None -> CPU count, 1 -> in-process
+    crop_geometry: CropGeometry = field(default_factory=CropGeometry)
+    timestamped_dirs: bool = True  # False -> no failed_<ts>/passed_<ts> level (batch aggregate tree)
+    area_exact: bool = True        # False -> streaming P² quantiles for the blob-area stats
+    area_bin_width: int = DEFAULT_BIN_WIDTH
+    engine: str = "python"         # "python", "numpy" (ff_columnar) or "auto" (numpy when installed)
+    profile: bool = False          # dump cProfile stats to analysis_profile_<ts>.prof next to the CSV
+    index_cache: bool = True       # reuse the source-folder listing across runs (see ff_index)
+    result_cache: bool = True      # reuse classification results of an unchanged CSV (see ff_cache)
+    resume: bool = True            # journal the execute phase and resume an earlier run's (see ff_journal)
+    history: bool = True           # record the run in the run-history database (see ff_history)
+    history_path: str = ""         # empty -> ff_history.default_history_path()
+    pause_gc: bool = False         # suspend the cyclic GC while the CSV is scanned (CLI/batch, not the GUI)
+
+
+@dataclass
+class AnalysisResult:
+    """Structured outcome of run_analysis()."""
+    csv_path: str
+    total_rows: int
+    expected_max: int
+    images: int = 0
+    failed: list = field(default_factory=list)          # (img_name, min BlobNumResults, model)
+    passed: list = field(default_factory=list)          # (img_name, expected_max, model, category)
+    actions: list = field(default_factory=list)         # [img_name, val, model, kind, action, note]
+    area: object = None                                  # ff_stats.AreaSummary over all blobs
+    area_by_model: dict = field(default_factory=dict)    # blob ModelNumber -> AreaSummary
+    area_histogram: list = field(default_factory=list)   # [(bin_start, count), ...]
+    area_bin_width: int = DEFAULT_BIN_WIDTH
+    action_mode: str = "move"
+    executed: bool = False
+    moved_count: int = 0
+    missing_count: int = 0
+    skipped_count: int = 0                               # already at the destination (earlier, interrupted run)
+    resumed_ts: str = None                               # timestamp of the earlier run whose folders were reused
+    log_path: str = None
+    save_passed: bool = False
+    cancelled: bool = False
+    crops_written: int = 0
+    crop_dir: str = None                                 # where blob crops went (see find_crops); None without crops
+    metrics: RunMetrics = None                           # per-stage wall time and counters
+    metrics_path: str = None                             # analysis_metrics_<ts>.json (with save_logs)
+    timing_path: str = None                              # analysis_timing_<ts>.csv (with save_logs)
+    profile_path: str = None                             # analysis_profile_<ts>.prof (with profile)
+    cache_hit: bool = False                              # classification came from ff_cache
+    history_run_id: int = None                           # run_id in the history database (with history)
+    history_path: str = None
+
+    @property
+    def area_median(self):
+        return self.area.p50 if self.area else None
+
+    @property
+    def area_min(self):
+        return self.area.min if self.area else None
+
+    @property
+    def area_max(self):
+        return self.area.max if self.area else None
+
+
+def resolve_dirs(csv_path, img_src_dir="", failed_dir=""):
+    """Return (csv_path, img_src_dir, failed_dir) with the defaults applied, or raise AnalysisError."""
+    csv_path = (csv_path or "").strip()
+    if not csv_path or not os.path.exists(csv_path):
+        raise AnalysisError("Please select a valid CSV file.")
+    csv_path = os.path.abspath(csv_path)  # a bare file name has no parent folder to default to
+    csv_dir = os.path.dirname(csv_path)
+    parent_dir = os.path.dirname(csv_dir)
+
+    img_src_dir = (img_src_dir or "").strip() or parent_dir
+    if not img_src_dir or not os.path.isdir(img_src_dir):
+        raise AnalysisError("Invalid source images folder.")
+
+    failed_dir = (failed_dir or "").strip() or csv_dir
+    if not failed_dir:
+        raise AnalysisError("Please select a destination folder for FAILED images.")
+
+    return csv_path, img_src_dir, failed_dir
+
+
+def parse_blob_area(num_results, cols, row, stats):
+    """Add the area of every reported blob in the row to stats, keyed by its ModelNumber."""
+    cell = cols.cell
+    for a_idx, m_idx in zip(cols.area[:max(num_results, 0)], cols.model):
+        raw = cell(row, a_idx)
+        if not raw:
+            continue
+        try:
+            area = int(raw)
+        except ValueError:
+            continue
+        stats.add(area, cell(row, m_idx).strip())
+
+
+def blob_crops(num_results, cols, row, crop_dir, geometry, models, index=None):
+    """Return (image_path, [(blob_path, box), ...]) for every blob of one export row.
+
+    Crops go to crop_dir/model<N>/<i>_<ImageName>; model folders are created the first time
+    a model number is seen. The vertical centre comes from BlobPositionY0N when the export
+    has it, else from the geometry. The source image is looked up in index (an
+    ff_index.ImageIndex of the source folder) when given, else ImageDirectory/ImageName is used.
+    """
+    img_name = cols.cell(row, cols.image)
+    crops = []
+    for i in range(num_results):
+        model = int(cols.cell(row, cols.model[i]))
+
+        if model not in models:
+            # we need to make the model directory
+            os.makedirs(os.path.join(crop_dir, "model" + str(model)), exist_ok=True)
+            models.add(model)
+
+        pos_y = cols.cell(row, cols.pos_y[i])
+        box = geometry.box(int(cols.cell(row, cols.pos_x[i])), int(pos_y) if pos_y else None)
+        blob_path = os.path.join(crop_dir, "model" + str(model), str(i) + "_" + img_name)
+        crops.append((blob_path, box))
+    found = index.path(img_name) if index is not None else None
+    return found or os.path.join(cols.cell(row, cols.directory), img_name), crops
+
+
+def find_crops(crop_dir, img_name):
+    """Crops written by blob_crops() for img_name, as [(model, blob_index, path), ...] in blob order."""
+    try:
+        model_dirs = [e.name for e in os.scandir(crop_dir) if e.is_dir() and e.name.startswith("model")]
+    except OSError:
+        return []
+    found = []
+    i = 0
+    while True:
+        name = f"{i}_{img_name}"
+        hits = [d for d in model_dirs if os.path.exists(os.path.join(crop_dir, d, name))]
+        if not hits:
+            return found
+        found.extend((d[len("model"):], i, os.path.join(crop_dir, d, name)) for d in hits)
+        i += 1
+
+
+LOG_HEADER = ["ImageName", "BlobNumResults", "Model", "Kind", "Action", "Note"]
+
+
+def write_log(log_path, rows, append=False):
+    """Write (or append) action rows to an analysis_log CSV, adding the header to new files."""
+    new_file = not (append and os.path.exists(log_path))
+    with open(log_path, "w" if new_file else "a", newline="", encoding="utf-8") as lf:
+        w = csv.writer(lf)
+        if new_file:
+            w.writerow(LOG_HEADER)
+        w.writerows(rows)
+
+
+def _no_progress(stage, done, total=None, item=None):
+    pass
+
+
+@dataclass
+class ScanResult:
+    """Everything the classification phase produces, whichever engine ran it."""
+    total_rows: int
+    expected_max: int
+    images: int
+    under_max: list
+    passed: list
+    area_stats: AreaStats        # None when restored from ff_cache
+    crops_written: int = 0
+
+
+def scan_export(opts, csv_path, failed_dir, report, cancelled, metrics, index):
+    """Pure-Python engine: one streaming pass over the export (see run_analysis for the callbacks)."""
+    expected_max = opts.expected_max
+    base_model = extract_model_from_name(os.path.basename(csv_path), "Unknown")
+    models = set()
+    area_stats = AreaStats(exact=opts.area_exact, bin_width=opts.area_bin_width)
+    tallies = {}
+    total_rows = 0
+    crops_written = 0
+    clock = time.perf_counter
+    parse_s = classify_s = area_s = crop_s = 0.0  # stage times, summed per row
+    # Single streaming pass: classification inputs, area stats and crop batches per row.
+    # Each row's crops are cut from one decode of its BMP on the crop pool.
+    try:
+        with open(csv_path, "r", newline="", encoding="utf-8", errors="ignore") as f, \
+                CropPool(opts.crop_workers if opts.extract_crops else 1) as crop_pool:
+            cols, rows = open_export(f)
+            mark = clock()
+            for row in rows:
+                t0 = clock()
+                parse_s += t0 - mark
+                total_rows += 1
+                if total_rows % PROGRESS_EVERY == 0:
+                    if cancelled():
+                        raise AnalysisCancelled("Analysis cancelled.")
+                    report("parse", total_rows)
+                    if opts.extract_crops:
+                        report("crop", crop_pool.written)
+                tally_row(tallies, cols, row, opts.save_passed)
+                t1 = clock()
+                classify_s += t1 - t0
+                try:
+                    expected_max = int(cols.cell(row, cols.search_max))
+                    val = to_float(cols.cell(row, cols.results))
+                    if val == val:  # not NaN
+                        parse_blob_area(int(val), cols, row, area_stats)
+                        t2 = clock()
+                        area_s += t2 - t1
+                        t1 = t2
+                        if opts.extract_crops:
+                            image_path, crops = blob_crops(int(val), cols, row, failed_dir, opts.crop_geometry,
+                                                           models, index)
+                            crop_pool.submit(image_path, crops)
+                except Exception:
+                    ## without this try/except the last and first line of the csv will throw a fault
+                    pass
+                mark = clock()
+                crop_s += mark - t1
+            t0 = clock()
+            crops_written = crop_pool.close()
+            crop_s += clock() - t0
+    except (OSError, csv.Error) as e:
+        raise AnalysisError(f"Failed to parse CSV:\n{e}")
+    report("parse", total_rows, total_rows)
+    if opts.extract_crops:
+        report("crop", crops_written, crops_written)
+
+    metrics.add("parse", "rows", parse_s, total_rows, os.path.getsize(csv_path))
+    with metrics.timed("classify", "images") as stage:
+        under_max, passed = classify_images(tallies, expected_max, base_model,
+                                            opts.separate_by_model, opts.save_passed)
+        stage.items += len(tallies)
+    stage.seconds += classify_s
+    metrics.add("area", "blobs", area_s)
+    if opts.extract_crops:
+        metrics.add("crop", "crops", crop_s, crops_written)
+    return ScanResult(total_rows, expected_max, len(tallies), under_max, passed, area_stats, crops_written)
+
+
+def _scanner(engine):
+    if engine == "python":
+        return scan_export
+    from ff_columnar import numpy_available, scan_export_columnar
+    if numpy_available():
+        return scan_export_columnar
+    if engine == "numpy":
+        raise AnalysisError("The numpy engine was requested but NumPy is not installed.")
+    return scan_export
+
+
+def _result_settings(opts, img_src_dir, failed_dir):
+    """The options that change what the classification phase produces (part of the cache key)."""
+    crops = None
+    if opts.extract_crops:  # a hit skips crop extraction, so the crops must already be where this run puts them
+        crops = [os.path.abspath(img_src_dir), os.path.abspath(failed_dir), astuple(opts.crop_geometry)]
+    return dict(expected_max=opts.expected_max, separate_by_model=opts.separate_by_model,
+                save_passed=opts.save_passed, area_exact=opts.area_exact, area_bin_width=opts.area_bin_width,
+                crops=crops)
+
+
+def _crop_manifest(crop_dir):
+    """{model folder: a few of its crop file names} for crop_dir, or None if it cannot be listed."""
+    manifest = {}
+    try:
+        for entry in os.scandir(crop_dir):
+            if entry.is_dir() and entry.name.startswith("model"):
+                names = os.listdir(entry.path)
+                manifest[entry.name] = names[::max(1, len(names) // CROP_SAMPLES)][:CROP_SAMPLES]
+    except OSError:
+        return None
+    return manifest
+
+
+def _crops_present(crop_dir, manifest):
+    """True if every crop named in a cached result's manifest is still in crop_dir."""
+    return manifest is not None and all(os.path.exists(os.path.join(crop_dir, d, name))
+                                        for d, names in manifest.items() for name in names)
+
+
+def _scan_payload(scan, area, crops=None):
+    summary, by_model, histogram, bin_width = area
+    return {"total_rows": scan.total_rows, "expected_max": scan.expected_max, "images": scan.images,
+            "under_max": scan.under_max, "passed": scan.passed, "crops": crops,
+            "area": astuple(summary) if summary else None,
+            "area_by_model": [[m, astuple(s)] for m, s in by_model.items()],
+            "area_histogram": histogram, "area_bin_width": bin_width}
+
+
+def _scan_from_payload(p):
+    """(ScanResult, area) from a cached payload; area is (summary, by_model, histogram, bin_width).
+
+    No crops are written on a hit, so crops_written is 0.
+    """
+    scan = ScanResult(p["total_rows"], p["expected_max"], p["images"], [tuple(x) for x in p["under_max"]],
+                      [tuple(x) for x in p["passed"]], None, 0)
+    area = (AreaSummary(*p["area"]) if p["area"] else None, {m: AreaSummary(*s) for m, s in p["area_by_model"]},
+            [tuple(x) for x in p["area_histogram"]], p["area_bin_width"])
+    return scan, area
+
+
+@contextmanager
+def _gc_paused():
+    """Suspend the cyclic GC: a scan allocates millions of short-lived row objects but no cycles.
+
+    The GC is process-wide, so this is only used where nothing else runs alongside
+    (opts.pause_gc), and only around the scan.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def run_analysis(opts, progress=None, cancel=None):
+    """Analyze one CSV export and optionally move/copy the affected images.
+
+    progress, if given, is called as progress(stage, done, total, item) with stage one of
+    "parse" (rows read), "classify" (images classified), "crop" (crops written) or
+    "transfer" (images handled; item is the [img_name, val, model, kind, action, note] row).
+    cancel is an object with is_set() (e.g. threading.Event); it is checked between rows and
+    between files. Cancelling while parsing raises AnalysisCancelled; cancelling during the
+    execute phase lets in-flight files finish and returns a result with cancelled=True.
+
+    Classification results of an unchanged CSV are reused from ff_cache (opts.result_cache);
+    a hit skips parsing and crop extraction and goes straight to the execute phase.
+    Per-stage timings and counters are returned in result.metrics (see ff_metrics). With
+    opts.profile the run is profiled with cProfile and the stats are dumped next to the CSV.
+
+    Returns an AnalysisResult. Raises AnalysisError if the run cannot start.
+    """
+    ts = time.strftime("%Y%m%d_%H%M%S")
+    if not opts.profile:
+        return _run_analysis(opts, progress, cancel, ts)
+    import cProfile
+
+    profile_path = os.path.join(os.path.dirname(opts.csv_path.strip()), f"analysis_profile_{ts}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = _run_analysis(opts, progress, cancel, ts)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+    result.profile_path = profile_path
+    return result
+
+
+def _run_analysis(opts, progress, cancel, ts):
+    csv_path, img_src_dir, failed_dir = resolve_dirs(opts.csv_path, opts.img_src_dir, opts.failed_dir)
+    execute = opts.execute
+    report = progress or _no_progress
+    metrics = RunMetrics()
+
+    def cancelled():
+        return cancel is not None and cancel.is_set()
+
+    cache = cached = None
+    if opts.result_cache:
+        with metrics.timed("cache", "hits") as stage:
+            cache = open_cache()
+            if cache is not None:
+                st = os.stat(csv_path)
+                identity = dict(csv_path=os.path.abspath(csv_path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                content_hash=file_digest(csv_path))
+                key = make_key(**identity, **_result_settings(opts, img_src_dir, failed_dir))
+                cached = cache.get(key)
+                if cached is not None and opts.extract_crops and not _crops_present(failed_dir, cached.get("crops")):
+                    cached = None  # crops moved or deleted since: extract them again
+                stage.items = int(cached is not None)
+                stage.nbytes = st.st_size
+
+    index = None
+    if execute or (opts.extract_crops and cached is None):
+        with metrics.timed("index", "files") as stage:
+            try:
+                index = load_index(img_src_dir, use_cache=opts.index_cache)
+            except OSError as e:
+                raise AnalysisError(f"Cannot list the source images folder:\n{e}")
+            stage.items = len(index)
+
+    if cached is None:
+        with _gc_paused() if opts.pause_gc else nullcontext():
+            scan = _scanner(opts.engine)(opts, csv_path, failed_dir, report, cancelled, metrics, index)
+        with metrics.timed("area", "blobs") as stage:
+            stats = scan.area_stats
+            area = (stats.summary(), stats.by_model(), stats.histogram(), stats.bin_width)
+            stage.items = len(stats)
+        if cache is not None:
+            crops = _crop_manifest(failed_dir) if opts.extract_crops else None
+            cache.put(key, _scan_payload(scan, area, crops), **identity)
+    else:
+        scan, area = _scan_from_payload(cached)
+    if cache is not None:
+        cache.close()
+    under_max, passed, expected_max = scan.under_max, scan.passed, scan.expected_max
+    report("classify", scan.images, scan.images)
+
+    log_path = os.path.join(os.path.dirname(csv_path), f"analysis_log_{ts}.csv") if opts.save_logs else None
+
+    result = AnalysisResult(csv_path=csv_path, total_rows=scan.total_rows, expected_max=expected_max, images=scan.images,
+                            failed=under_max, passed=passed, action_mode=opts.action_mode,
+                            executed=execute, log_path=log_path, save_passed=opts.save_passed,
+                            crops_written=scan.crops_written, metrics=metrics,
+                            crop_dir=failed_dir if opts.extract_crops else None, cache_hit=cached is not None)
+    result.area, result.area_by_model, result.area_histogram, result.area_bin_width = area
+
+    journal = None
+    dest_ts = ts
+    if execute:
+        os.makedirs(failed_dir, exist_ok=True)
+        if opts.resume:
+            st = os.stat(csv_path)
+            journal_key = make_key(csv_path=os.path.abspath(csv_path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                   failed_dir=os.path.abspath(failed_dir), expected_max=expected_max,
+                                   separate_by_model=opts.separate_by_model, save_passed=opts.save_passed,
+                                   timestamped_dirs=opts.timestamped_dirs)
+            try:
+                journal = TransferJournal.open(journal_path(csv_path), journal_key, ts, opts.action_mode)
+            except OSError:
+                journal = None  # read-only CSV folder: run unjournaled
+            if journal is not None and journal.resumed:
+                dest_ts = result.resumed_ts = journal.ts
+
+    # (log row, destination folder) for every image the execute phase handles
+    planned = []
+    subs = {}  # (model, category) -> folder; only a handful per run
+
+    def sub_for(model, cat=None):
+        key = (model, cat)
+        if key not in subs:
+            subs[key] = destination_dir(failed_dir, dest_ts, model, opts.separate_by_model, cat, opts.timestamped_dirs)
+        return subs[key]
+
+    for img_name, val, model in under_max:
+        planned.append(([img_name, val, model, "failed"], sub_for(model)))
+    if opts.save_passed:
+        for img_name, val, model, cat in passed:
+            planned.append(([img_name, val, model, f"passed-{cat}"], sub_for(model, cat)))
+
+    if not execute:
+        for i, (row, _) in enumerate(planned):
+            result.actions.append(row + ["", ""])
+            report("transfer", i + 1, len(planned), result.actions[-1])
+    else:
+        # the source-folder index answers existence and size without a stat per image
+        outcomes = [("missing", "source-missing")] * len(planned)
+        found, jobs = [], []
+        listings = {}  # destination folder -> its files, listed once when resuming
+        for i, (row, sub) in enumerate(planned):
+            name = index.lookup(row[0])
+            if journal is not None and journal.resumed:
+                dst = os.path.join(sub, row[0])
+                # done, or moved just before the interruption with the completion not journaled yet;
+                # either way only if the destination still holds the recorded file
+                if dst in journal.intents and (dst in journal.done or name is None):
+                    if sub not in listings:
+                        listings[sub] = ImageIndex.scan(sub).entries if os.path.isdir(sub) else {}
+                    _, size, mtime_ns = journal.intents[dst]
+                    if same_file(listings[sub].get(row[0]), size, mtime_ns):
+                        outcomes[i] = ("skipped", "done-in-earlier-run" if dst in journal.done
+                                       else "already-at-destination")
+            if name is None or outcomes[i][0] == "skipped":
+                report("transfer", i + 1 - len(found), len(planned), row + list(outcomes[i]))
+                continue
+            found.append(i)
+            jobs.append(TransferJob(os.path.join(index.folder, name), sub, row[0], *index.entries[name]))
+        skipped = len(planned) - len(found)
+
+        def on_file(done, total, j, outcome):
+            if journal is not None and outcome[0] in ("moved", "copied", "skipped"):
+                journal.record(os.path.join(jobs[j].dst_dir, jobs[j].name), outcome[0])
+            report("transfer", skipped + done, len(planned), planned[found[j]][0] + list(outcome))
+
+        with metrics.timed("transfer", "files") as stage:
+            moved = None
+            try:
+                if journal is not None:
+                    journal.begin(jobs)
+                moved = transfer_files(jobs, mode=opts.action_mode, workers=opts.transfer_workers,
+                                       progress=on_file, cancel=cancel,
+                                       overwrite=opts.timestamped_dirs)  # never clobber the aggregate tree
+            finally:
+                if journal is not None:
+                    journal.close(complete=moved is not None and None not in moved)
+        for i, outcome in zip(found, moved):
+            outcomes[i] = outcome
+        for (row, _), outcome in zip(planned, outcomes):
+            if outcome is None:
+                result.cancelled = True
+                continue
+            action, note = outcome
+            if action in ("moved", "copied"):
+                result.moved_count += 1
+                stage.items += 1
+                stage.nbytes += index.size(row[0])
+            elif action == "missing":
+                result.missing_count += 1
+            elif action == "skipped":
+                result.skipped_count += 1
+            result.actions.append(row + [action, note])
+
+    if opts.history:
+        with metrics.timed("history", "images") as stage:
+            recipe, camera = parse_export_name(csv_path)
+            model = extract_model_from_name(os.path.basename(csv_path), "Unknown")
+            started = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(metrics.started))
+            result.history_run_id, result.history_path = record_run(result, started, recipe, camera, model,
+                                                                    opts.history_path or None)
+            stage.items = len(result.actions)
+
+    if log_path:
+        with metrics.timed("log", "files") as stage:
+            write_log(log_path, result.actions)
+            stage.items += 1
+            if result.area_histogram:
+                hist_path = os.path.join(os.path.dirname(csv_path), f"area_histogram_{ts}.csv")
+                with open(hist_path, "w", newline="", encoding="utf-8") as hf:
+                    w = csv.writer(hf)
+                    w.writerow(["AreaFrom", "AreaTo", "Count"])
+                    for start, count in result.area_histogram:
+                        w.writerow([start, start + result.area_bin_width - 1, count])
+                stage.items += 1
+    metrics.finish()
+    if log_path:
+        result.timing_path = os.path.join(os.path.dirname(csv_path), f"analysis_timing_{ts}.csv")
+        with open(result.timing_path, "w", newline="", encoding="utf-8") as tf:
+            w = csv.writer(tf)
+            w.writerow(TIMING_HEADER)
+            w.writerows(metrics.timing_rows())
+        result.metrics_path = os.path.join(os.path.dirname(csv_path), f"analysis_metrics_{ts}.json")
+        with open(result.metrics_path, "w", encoding="utf-8") as mf:
+            json.dump(dict(metrics.to_dict(), csv_path=csv_path, engine=opts.engine, rows=result.total_rows),
+                      mf, indent=2)
+
+    return result
+
+
+def format_summary(result, max_examples=200):
+    """Render an AnalysisResult as the text shown in the results pane / printed by the CLI."""
+    lines = [
+        f"CSV: {result.csv_path}",
+        f"Total rows: {result.total_rows}",
+        f"Expected max: {result.expected_max}",
+        f"Under-max count: {len(result.failed)}",
+    ]
+    if result.area is not None:
+        lines.append(f"Median blob size: {result.area_median:g} Min blob size: {result.area_min} Max blob size: {result.area_max}")
+        lines.append(f"Blob area (all): {result.area.describe()}")
+        for model, summary in result.area_by_model.items():
+            lines.append(f"Blob area (model {model or '?'}): {summary.describe()}")
+    else:
+        lines.append("Median blob size: n/a (no blob areas found)")
+    lines.append("")
+    if result.save_passed:
+        lines.append(f"Passed count: {len(result.passed)}")
+    if result.log_path:
+        lines.append(f"Log written to: {result.log_path}")
+    else:
+        lines.append("Log saving disabled.")
+    if result.executed:
+        lines.append(f"Action: {result.action_mode}")
+        lines.append(f"Processed: {result.moved_count}, Missing: {result.missing_count}")
+        if result.resumed_ts:
+            lines.append(f"Resumed the execute phase of the {result.resumed_ts} run; "
+                         f"{result.skipped_count} images were already at their destination.")
+    if result.cancelled:
+        lines.append(f"Cancelled after {len(result.actions)} of the selected images.")
+    if result.cache_hit:
+        lines.append("Classification reused from the result cache (CSV unchanged).")
+    if result.history_run_id is not None:
+        lines.append(f"Recorded as run {result.history_run_id} in {result.history_path}")
+    if result.metrics_path:
+        lines.append(f"Metrics written to: {result.metrics_path}")
+    if result.timing_path:
+        lines.append(f"Timings written to: {result.timing_path}")
+    if result.profile_path:
+        lines.append(f"Profile written to: {result.profile_path}")
+    if result.metrics is not None and result.metrics.stages:
+        lines.append("")
+        lines.append("Timings:")
+        lines.append(result.metrics.format())
+
+    if result.failed and max_examples > 0:
+        lines.append("")
+        lines.append("Under-max examples:")
+        for img_name, val, _ in result.failed[:max_examples]:
+            lines.append(f"  {img_name} -> {val}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,210 @@
+"""Batch analysis of many FastForward exports.
+
+Finds FastForward_<recipe>_<camera>.csv files under directories or globs,
+runs ff_analysis.run_analysis() on them in parallel across processes and
+merges the outcome into one report: per camera (export) and per model
+(N### from extract_model_from_name). Per-model blob areas merge the exports'
+summaries and histograms (ff_stats.merge_summaries). With an aggregate folder, failed images
+from every export are moved/copied straight into
+
+    <aggregate>/<model>/<recipe>_<camera>/
+
+so the separate collect_failed.sh consolidation step is not needed.
+"""
+import csv
+import fnmatch
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+
+from ff_analysis import LOG_HEADER, extract_model_from_name, parse_export_name, run_analysis
+from ff_stats import DEFAULT_BIN_WIDTH, merge_summaries
+
+EXPORT_PATTERN = "FastForward_*.csv"
+
+
+def find_exports(patterns):
+    """Expand directories (searched recursively), globs and plain files into a sorted list of CSV paths."""
+    found = {}
+    for pat in patterns:
+        if os.path.isdir(pat):
+            for root, _, files in os.walk(pat):
+                for name in files:
+                    if fnmatch.fnmatch(name.lower(), EXPORT_PATTERN.lower()):
+                        path = os.path.join(root, name)
+                        found.setdefault(os.path.abspath(path), path)
+        elif any(ch in pat for ch in "*?["):
+            for path in glob.glob(pat, recursive=True):
+                if os.path.isfile(path):
+                    found.setdefault(os.path.abspath(path), path)
+        elif os.path.isfile(pat):
+            found.setdefault(os.path.abspath(pat), pat)
+    return sorted(found.values())
+
+
+@dataclass
+class ExportSummary:
+    """Outcome of one export inside a batch."""
+    csv_path: str
+    recipe: str
+    camera: str
+    model: str
+    rows: int = 0
+    images: int = 0
+    failed: int = 0
+    passed: int = 0
+    area: object = None                                  # ff_stats.AreaSummary over all blobs
+    area_histogram: list = field(default_factory=list)   # [(bin_start, count), ...]
+    area_bin_width: int = DEFAULT_BIN_WIDTH
+    moved: int = 0
+    missing: int = 0
+    error: str = ""
+    actions: list = field(default_factory=list)
+
+    @property
+    def under_max_rate(self):
+        return self.failed / self.images if self.images else 0.0
+
+    @property
+    def area_median(self):
+        return self.area.p50 if self.area else None
+
+    @property
+    def area_min(self):
+        return self.area.min if self.area else None
+
+    @property
+    def area_max(self):
+        return self.area.max if self.area else None
+
+
+@dataclass
+class ModelSummary(ExportSummary):
+    """Exports of one model merged; csv_path, recipe and camera stay empty."""
+    csv_path: str = ""
+    recipe: str = ""
+    camera: str = ""
+    model: str = ""
+    exports: int = 0
+
+
+def _analyze_one(opts, recipe, camera, model):
+    summary = ExportSummary(opts.csv_path, recipe, camera, model)
+    try:
+        r = run_analysis(opts)
+    except Exception as e:  # AnalysisError, or e.g. an OSError mid-transfer; keep the rest of the batch
+        summary.error = str(e) or type(e).__name__
+        return summary
+    summary.rows, summary.images = r.total_rows, r.images
+    summary.failed, summary.passed = len(r.failed), len(r.passed)
+    summary.area, summary.area_histogram, summary.area_bin_width = r.area, r.area_histogram, r.area_bin_width
+    summary.moved, summary.missing = r.moved_count, r.missing_count
+    summary.actions = r.actions
+    return summary
+
+
+def run_batch(csv_paths, base_opts, aggregate_dir="", workers=None, progress=None):
+    """Analyze every export with base_opts as the template and return a list of ExportSummary.
+
+    Each export gets its own csv_path; with aggregate_dir its images go to the aggregate tree
+    described in the module docstring. progress, if given, is called as progress(done, total, summary).
+    """
+    jobs = []
+    for path in csv_paths:
+        recipe, camera = parse_export_name(path)
+        model = extract_model_from_name(os.path.basename(path), "Unknown")
+        opts = replace(base_opts, csv_path=path, save_logs=False,
+                       crop_workers=1)  # parallelism is per export here
+        if aggregate_dir:
+            tag = f"{recipe}_{camera}" if camera else recipe
+            opts = replace(opts, failed_dir=os.path.join(aggregate_dir, model, tag), timestamped_dirs=False)
+        jobs.append((opts, recipe, camera, model))
+
+    summaries = [None] * len(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        for i, job in enumerate(jobs):
+            summaries[i] = _analyze_one(*job)
+            if progress:
+                progress(i + 1, len(jobs), summaries[i])
+        return summaries
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = {pool.submit(_analyze_one, *job): i for i, job in enumerate(jobs)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            i = futures[fut]
+            try:
+                summaries[i] = fut.result()
+            except Exception as e:  # worker crashed; keep the rest of the batch
+                opts, recipe, camera, model = jobs[i]
+                summaries[i] = ExportSummary(opts.csv_path, recipe, camera, model, error=str(e))
+            if progress:
+                progress(done, len(jobs), summaries[i])
+    return summaries
+
+
+def summarize_models(summaries):
+    """Merge export summaries per model, in first-seen order."""
+    models, areas = {}, {}
+    for s in summaries:
+        if s.error:
+            continue
+        m = models.setdefault(s.model, ModelSummary(model=s.model))
+        m.exports += 1
+        m.rows += s.rows
+        m.images += s.images
+        m.failed += s.failed
+        m.passed += s.passed
+        m.moved += s.moved
+        m.missing += s.missing
+        areas.setdefault(s.model, []).append((s.area, s.area_histogram, s.area_bin_width))
+    for model, m in models.items():
+        m.area, m.area_histogram, m.area_bin_width = merge_summaries(areas[model])
+    return list(models.values())
+
+
+def write_batch_report(summaries, report_dir, ts=None):
+    """Write batch_summary_<ts>.csv (per camera and per model) and batch_log_<ts>.csv (all actions).
+
+    Returns (summary_path, log_path).
+    """
+    ts = ts or time.strftime("%Y%m%d_%H%M%S")
+    os.makedirs(report_dir, exist_ok=True)
+    summary_path = os.path.join(report_dir, f"batch_summary_{ts}.csv")
+    log_path = os.path.join(report_dir, f"batch_log_{ts}.csv")
+    with open(summary_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Level", "Model", "Recipe", "Camera", "CSV", "Rows", "Images", "UnderMax", "Passed",
+                    "UnderMaxRate", "AreaMedian", "AreaMin", "AreaMax", "Processed", "Missing", "Error"])
+        for s in summaries:
+            w.writerow(["camera", s.model, s.recipe, s.camera, s.csv_path, s.rows, s.images, s.failed, s.passed,
+                        f"{s.under_max_rate:.4f}", s.area_median, s.area_min, s.area_max, s.moved, s.missing, s.error])
+        for m in summarize_models(summaries):
+            w.writerow(["model", m.model, "", "", "", m.rows, m.images, m.failed, m.passed, f"{m.under_max_rate:.4f}",
+                        m.area_median, m.area_min, m.area_max, m.moved, m.missing, ""])
+    with open(log_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["CSV"] + LOG_HEADER)
+        for s in summaries:
+            for row in s.actions:
+                w.writerow([s.csv_path] + row)
+    return summary_path, log_path
+
+
+def format_batch_summary(summaries):
+    lines = [f"Exports: {len(summaries)}", "", "Per camera:"]
+    for s in summaries:
+        name = f"{s.recipe}/{s.camera}" if s.camera else s.recipe
+        if s.error:
+            lines.append(f"  {name} [{s.model}]: ERROR {s.error.splitlines()[0]}")
+            continue
+        area = f" area median {s.area_median} min {s.area_min} max {s.area_max}" if s.area_min is not None else ""
+        lines.append(f"  {name} [{s.model}]: {s.failed}/{s.images} under-max ({s.under_max_rate:.2%}){area}")
+    lines.append("")
+    lines.append("Per model:")
+    for m in summarize_models(summaries):
+        area = f" area median {m.area_median:g} min {m.area_min} max {m.area_max}" if m.area_min is not None else ""
+        lines.append(f"  {m.model}: {m.failed}/{m.images} under-max ({m.under_max_rate:.2%}) over {m.exports} exports{area}")
+    return "\n".join(lines) + "\n"
@@ -1,38 +1,23 @@
+"""Tk front end of the blob checker (also the PyInstaller entry point).
+
+Startup is kept to Tk itself: the analysis engine (ff_analysis and, through it,
+crop/ff_cache/ff_stats) is imported on a background thread once the window is
+on screen, and PIL only when a crop preview is opened. Set
+FF_BLOB_STARTUP_PROBE=<file> to write startup timestamps to <file> and exit
+once the engine is loaded (see benchmarks/bench_startup.py).
+"""
 import os
-import re
-import csv
-import shutil
+import queue
+import sys
+import threading
 import time
 import tkinter as tk
-from crop import crop_image
 from tkinter import filedialog, messagebox, ttk
-from statistics import median, mean
-from collections import defaultdict
 
-APP_TITLE = "FastForward Blob Checker"
+from ff_results_view import ResultsTable
 
-def parse_csv(csv_path):
-    """Parse CSV exported by the vision application. First line is metadata and must be skipped."""
-    rows = []
-    with open(csv_path, "r", newline="", encoding="utf-8", errors="ignore") as f:
-        _ = f.readline()  # skip metadata
-        reader = csv.DictReader(f, delimiter=";")
-        for row in reader:
-            rows.append(row)
-    return rows
-
-def to_float(val, default=float("nan")):
-    try:
-        return float(val)
-    except Exception:
-        return default
-
-def extract_model_from_name(name, fallback):
-    """Extract N### from a string, else fallback."""
-    if not name:
-        return fallback
-    m = re.search(r"N\d{3}", str(name))
-    return m.group(0) if m else fallback
+APP_TITLE = "FastForward Blob Checker"
+POLL_MS = 100          # how often the UI drains the worker queue
 
 class App(tk.Tk):
     def __init__(self):
@@ -56,14 +41,25 @@ class App(tk.Tk):
 
         self.sep_model_var = tk.BooleanVar(value=False)
         self.save_passed_var = tk.BooleanVar(value=False)
+        self.profile_var = tk.BooleanVar(value=False)
 
-        self.minArea = 0
-        self.maxArea = 0
-        self.models = []
+        self.status_var = tk.StringVar(value="Idle.")
+
+        # Background worker state
+        self._worker = None
+        self._events = queue.Queue()
+        self._cancel = threading.Event()
+        self._progress = {}
+        self._started = 0.0
+        self._streamed = []    # result rows received since the last poll
 
         # UI Layout
         self._build_ui()
 
+        # the engine loads while the user picks a CSV
+        self._loader = threading.Thread(target=_load_engine, daemon=True)
+        self._loader.start()
+
     def _build_ui(self):
         pad = {"padx": 10, "pady": 6}
         frm = ttk.Frame(self)
@@ -114,19 +110,29 @@ class App(tk.Tk):
         ttk.Checkbutton(frm, text="Save CSV logs (disabled by default)", variable=self.save_logs_var).grid(row=12, column=0, columnspan=3, sticky="w", **pad)
         ttk.Checkbutton(frm, text="Separate failed folders by model number", variable=self.sep_model_var).grid(row=13, column=0, columnspan=3, sticky="w", **pad)
         ttk.Checkbutton(frm, text="Also save passing images (categorized by 1-top / 2-bottom / mixed)", variable=self.save_passed_var).grid(row=14, column=0, columnspan=3, sticky="w", **pad)
+        ttk.Checkbutton(frm, text="Profile the run (writes analysis_profile_<ts>.prof next to the CSV)", variable=self.profile_var).grid(row=15, column=0, columnspan=3, sticky="w", **pad)
 
         # Buttons
         actions2 = ttk.Frame(frm)
-        actions2.grid(row=15, column=0, columnspan=3, sticky="we", **pad)
-        ttk.Button(actions2, text="Analyze (no move/copy)", command=self.analyze_only).pack(side="left", padx=6)
-        ttk.Button(actions2, text="Analyze & Execute", command=self.analyze_and_execute).pack(side="left", padx=6)
-
-        # Results
-        ttk.Label(frm, text="Results:").grid(row=16, column=0, sticky="w", **pad)
-        self.text = tk.Text(frm, height=16, wrap="word")
-        self.text.grid(row=17, column=0, columnspan=3, sticky="nsew", **pad)
-
-        frm.rowconfigure(17, weight=1)
+        actions2.grid(row=16, column=0, columnspan=3, sticky="we", **pad)
+        self.analyze_btn = ttk.Button(actions2, text="Analyze (no move/copy)", command=self.analyze_only)
+        self.analyze_btn.pack(side="left", padx=6)
+        self.execute_btn = ttk.Button(actions2, text="Analyze & Execute", command=self.analyze_and_execute)
+        self.execute_btn.pack(side="left", padx=6)
+        self.cancel_btn = ttk.Button(actions2, text="Cancel", command=self.cancel_run, state="disabled")
+        self.cancel_btn.pack(side="left", padx=6)
+        ttk.Label(actions2, textvariable=self.status_var).pack(side="left", padx=12)
+
+        # Results: summary text and a table of every failed/passed image
+        ttk.Label(frm, text="Results:").grid(row=17, column=0, sticky="w", **pad)
+        self.results = ttk.Notebook(frm)
+        self.results.grid(row=18, column=0, columnspan=3, sticky="nsew", **pad)
+        self.text = tk.Text(self.results, height=16, wrap="word")
+        self.results.add(self.text, text="Summary")
+        self.table = ResultsTable(self.results)
+        self.results.add(self.table, text="Images (double-click for crops)")
+
+        frm.rowconfigure(18, weight=1)
         frm.columnconfigure(1, weight=1)
 
         self._toggle_img_dir_controls()
@@ -172,208 +178,183 @@ class App(tk.Tk):
     def analyze_and_execute(self):
         self._run(execute=True)
 
-    def _resolve_dirs(self):
+    def _options(self, execute):
+        from ff_analysis import AnalysisError, AnalysisOptions
+
         csv_path = self.csv_path_var.get().strip()
         if not csv_path or not os.path.exists(csv_path):
-            raise ValueError("Please select a valid CSV file.")
+            raise AnalysisError("Please select a valid CSV file.")
         csv_dir = os.path.dirname(csv_path)
-        parent_dir = os.path.dirname(csv_dir)
-
-        img_src_dir = parent_dir if self.img_from_parent_var.get() else self.img_dir_var.get().strip()
-        if not img_src_dir or not os.path.isdir(img_src_dir):
-            raise ValueError("Invalid source images folder.")
-
+        try:
+            expected_max = int(self.expected_var.get().strip())
+        except Exception:
+            raise AnalysisError("Expected max must be an integer.")
+        img_src_dir = os.path.dirname(csv_dir) if self.img_from_parent_var.get() else self.img_dir_var.get().strip()
+        if not img_src_dir:
+            raise AnalysisError("Invalid source images folder.")
         failed_dir = csv_dir if self.failed_same_as_csv_var.get() else self.failed_dir_var.get().strip()
         if not failed_dir:
-            raise ValueError("Please select a destination folder for FAILED images.")
-
-        return csv_path, img_src_dir, failed_dir
-    
-    def parse_blob_area(self, num_results,r,areas):
-        
-        for i in range(num_results):
-            area = int(r.get("BlobArea0"+str(i+1),""))
-            areas.append(area)
-            if area < self.minArea:
-                self.minArea = area
-            if area > self.maxArea:
-                self.maxArea = area
-            return areas
-        
-    def extract_blob(self,num_results,r,model_path):
-        ## This saves a cropped image of each blob to folder based on the detected blob.
-        for i in range(num_results):
-            model = int(r.get("ModelNumber0"+str(i+1),""))
-
-            if not (model in self.models):
-                # we need to make the model directory
-                os.mkdir(self.failed_dir_var.get().strip() + "\\model" + str(model))
-                self.models.append(model)
-            
-            posY =  490 ##int(r.get("BlobPositionY0"+str(i+1),""))
-            posX = int(int(r.get("BlobPositionX0"+str(i+1),""))/100)            
-            length = 150   ##hard coding these for times sake, but can be parsed
-            height = 200
-            image_path = r.get("ImageDirectory","") + "\\" + r.get("ImageName","")
-            blob_path = self.failed_dir_var.get().strip() + "/model" + str(model) + "/" + str(i) + "_" + r.get("ImageName","")
-                       
-            cropBox = (posX-length/2,posY-height/2,posX+length/2,posY+length/2)
-            crop_image(image_path,blob_path,cropBox)
+            raise AnalysisError("Please select a destination folder for FAILED images.")
+        return AnalysisOptions(
+            csv_path=csv_path,
+            img_src_dir=img_src_dir,
+            failed_dir=failed_dir,
+            expected_max=expected_max,
+            action_mode=self.action_mode_var.get(),
+            save_logs=self.save_logs_var.get(),
+            separate_by_model=self.sep_model_var.get(),
+            save_passed=self.save_passed_var.get(),
+            execute=execute,
+            profile=self.profile_var.get(),
+        )
 
     def _run(self, execute=False):
+        from ff_analysis import AnalysisError
+
+        if self._worker is not None:
+            return
         self.text.delete("1.0", tk.END)
+        self.table.clear()
 
         try:
-            csv_path, img_src_dir, failed_dir = self._resolve_dirs()
-        except Exception as e:
+            opts = self._options(execute)
+        except AnalysisError as e:
             messagebox.showerror(APP_TITLE, str(e))
             return
 
+        self._cancel.clear()
+        self._progress = {}
+        self._streamed = []
+        self._started = time.perf_counter()
+        self._set_running(True)
+        self._worker = threading.Thread(target=self._work, args=(opts,), daemon=True)
+        self._worker.start()
+        self.after(POLL_MS, self._poll)
+
+    def _work(self, opts):
+        """Runs on the worker thread; everything it learns goes through self._events."""
+        from ff_analysis import AnalysisCancelled, AnalysisError, run_analysis
+
+        def progress(stage, done, total=None, item=None):
+            self._events.put(("progress", stage, done, total, item))
         try:
-            expected_max = int(self.expected_var.get().strip())
-        except Exception:
-            messagebox.showerror(APP_TITLE, "Expected max must be an integer.")
-            return
+            result = run_analysis(opts, progress=progress, cancel=self._cancel)
+        except AnalysisCancelled as e:
+            self._events.put(("cancelled", str(e)))
+        except AnalysisError as e:
+            self._events.put(("error", str(e)))
+        except Exception as e:
+            self._events.put(("error", f"Unexpected error:\n{e}"))
+        else:
+            self._events.put(("done", result))
 
+    def cancel_run(self):
+        if self._worker is not None:
+            self._cancel.set()
+            self.status_var.set("Cancelling after the current file…")
+
+    def _set_running(self, running):
+        self.analyze_btn.configure(state="disabled" if running else "normal")
+        self.execute_btn.configure(state="disabled" if running else "normal")
+        self.cancel_btn.configure(state="normal" if running else "disabled")
+
+    def _poll(self):
+        finished = None
         try:
-            rows = parse_csv(csv_path)
-        except Exception as e:
-            messagebox.showerror(APP_TITLE, f"Failed to parse CSV:\n{e}")
+            while True:
+                event = self._events.get_nowait()
+                if event[0] == "progress":
+                    self._on_progress(*event[1:])
+                else:
+                    finished = event
+        except queue.Empty:
+            pass
+        if self._streamed:
+            self.table.append_rows(self._streamed)
+            self._streamed = []
+        self._show_status()
+        if finished is None:
+            self.after(POLL_MS, self._poll)
             return
 
-        base_model = extract_model_from_name(os.path.basename(csv_path), "Unknown")
-        total_rows = len(rows)
-        under_max = []
-        blobAreas = []
-        for r in rows:           
-            try:
-                expected_max = int(r.get("BlobNumSearchMax",""))
-                val = to_float(r.get("BlobNumResults", ""))
-                if val != val:  # NaN
-                    continue
-                if val < expected_max:
-                    under_max.append((r.get("ImageName", ""), val))
-                self.extract_blob(int(val),r,csv_path) #for now use the csv path need to make it its own thing. 
-                blobAreas = self.parse_blob_area(int(val),r,blobAreas)
-            except:
-                ## without this try/except the last and first line of the csv will throw a fault
-                continue
-
-        # Group rows by image
-        grouped = defaultdict(list)
-        for r in rows:
-            img_name = r.get("ImageName") or ""
-            if img_name:  # skip rows with missing image name
-                grouped[img_name].append(r)
-
-        under_max, passed = [], []
-
-        for img, recs in grouped.items():
-            model = extract_model_from_name(img, base_model) if self.sep_model_var.get() else ""
-            blob_vals = [to_float(r.get("BlobNumResults", "")) for r in recs if r.get("BlobNumResults", "")]
-            if any(v < expected_max for v in blob_vals):
-                under_max.append((img, min(blob_vals), model))
-            elif all(v == expected_max for v in blob_vals):
-                if self.save_passed_var.get():
-                    # Collect ModelNumber## values
-                    labels = []
-                    for r in recs:
-                        for k, v in r.items():
-                            if k.startswith("ModelNumber") and v.strip():
-                                labels.append(v.strip())
-                    if labels and all(l == "1" for l in labels):
-                        cat = "1-top"
-                    elif labels and all(l == "2" for l in labels):
-                        cat = "2-bottom"
-                    else:
-                        cat = "mixed"
-                    passed.append((img, expected_max, model, cat))
-
-        ts = time.strftime("%Y%m%d_%H%M%S")
-        log_path = os.path.join(os.path.dirname(csv_path), f"analysis_log_{ts}.csv") if self.save_logs_var.get() else None
-
-        moved_count, missing_count = 0, 0
-        action_desc = self.action_mode_var.get()
-
-        if execute:
-            os.makedirs(failed_dir, exist_ok=True)
-
-        def handle_failed(file_list):
-            nonlocal moved_count, missing_count
-            results = []
-            for img_name, val, model in file_list:
-                action, note = "", ""
-                if execute:
-                    sub = os.path.join(failed_dir, model, f"failed_{ts}") if self.sep_model_var.get() else os.path.join(failed_dir, f"failed_{ts}")
-                    os.makedirs(sub, exist_ok=True)
-                    src, dst = os.path.join(img_src_dir, img_name), os.path.join(sub, img_name)
-                    if os.path.exists(src):
-                        try:
-                            if action_desc == "move":
-                                shutil.move(src, dst); action = "moved"
-                            else:
-                                shutil.copy2(src, dst); action = "copied"
-                            moved_count += 1
-                        except Exception as e:
-                            action, note = "error", str(e)
-                    else:
-                        action, note = "missing", "source-missing"; missing_count += 1
-                results.append([img_name, val, model, "failed", action, note])
-            return results
-
-        def handle_passed(file_list):
-            nonlocal moved_count, missing_count
-            results = []
-            for img_name, val, model, cat in file_list:
-                action, note = "", ""
-                if execute:
-                    sub = os.path.join(failed_dir, model, f"passed_{ts}", cat) if self.sep_model_var.get() else os.path.join(failed_dir, f"passed_{ts}", cat)
-                    os.makedirs(sub, exist_ok=True)
-                    src, dst = os.path.join(img_src_dir, img_name), os.path.join(sub, img_name)
-                    if os.path.exists(src):
-                        try:
-                            if action_desc == "move":
-                                shutil.move(src, dst); action = "moved"
-                            else:
-                                shutil.copy2(src, dst); action = "copied"
-                            moved_count += 1
-                        except Exception as e:
-                            action, note = "error", str(e)
-                    else:
-                        action, note = "missing", "source-missing"; missing_count += 1
-                results.append([img_name, val, model, f"passed-{cat}", action, note])
-            return results
-
-        failed_results = handle_failed(under_max)
-        passed_results = handle_passed(passed) if self.save_passed_var.get() else []
-
-        if log_path:
-            with open(log_path, "w", newline="", encoding="utf-8") as lf:
-                w = csv.writer(lf)
-                w.writerow(["ImageName", "BlobNumResults", "Model", "Kind", "Action", "Note"])
-                w.writerows(failed_results + passed_results)
-
-        # UI
-        self.text.insert(tk.END, f"CSV: {csv_path}\nTotal rows: {total_rows}\nExpected max: {expected_max}\n")
-        self.text.insert(tk.END, f"Under-max count: {len(under_max)}\n")
-        self.text.insert(tk.END, f"Median blob size: " + str(median(blobAreas)) + " Min blob size: " + str(min(blobAreas)) + " Max blob size: " + str(max(blobAreas))+"\n\n")
-        
-        self.text.insert(tk.END, f"Log written to: {log_path}\n")
-        if self.save_passed_var.get():
-            self.text.insert(tk.END, f"Passed count: {len(passed)}\n")
-        if log_path:
-            self.text.insert(tk.END, f"Log written to: {log_path}\n")
+        self._worker.join()
+        self._worker = None
+        self._set_running(False)
+        kind, payload = finished
+        if kind == "done":
+            self._on_done(payload)
+        elif kind == "cancelled":
+            self.status_var.set("Cancelled.")
+            self.text.insert(tk.END, "\nAnalysis cancelled.\n")
         else:
-            self.text.insert(tk.END, "Log saving disabled.\n")
-        if execute:
-            self.text.insert(tk.END, f"Action: {action_desc}\nProcessed: {moved_count}, Missing: {missing_count}\n")
+            self.status_var.set("Failed.")
+            messagebox.showerror(APP_TITLE, payload)
+
+    def _on_progress(self, stage, done, total, item):
+        self._progress[stage] = (done, total)
+        if stage == "transfer" and item is not None:
+            self._streamed.append(item)
+
+    def _show_status(self):
+        elapsed = max(time.perf_counter() - self._started, 1e-6)
+        parts = []
+        for stage, label in (("parse", "rows parsed"), ("classify", "images classified"),
+                             ("crop", "crops written"), ("transfer", "images handled")):
+            if stage in self._progress:
+                done, total = self._progress[stage]
+                parts.append(f"{done:,}/{total:,} {label}" if total and stage == "transfer" else f"{done:,} {label}")
+        rate_stage = "transfer" if "transfer" in self._progress else "parse"
+        if rate_stage in self._progress:
+            unit = "files/s" if rate_stage == "transfer" else "rows/s"
+            parts.append(f"{self._progress[rate_stage][0] / elapsed:,.0f} {unit}")
+        self.status_var.set(" | ".join(parts) if parts else "Working…")
+
+    def _on_done(self, result):
+        from ff_analysis import format_summary
+
+        self.status_var.set(f"Done in {time.perf_counter() - self._started:.1f}s.")
+        self.table.set_rows(result.actions, result.crop_dir)
+        self.text.insert("1.0", format_summary(result, max_examples=0))
+        messagebox.showinfo(APP_TITLE, f"Done. Under-max: {len(result.failed)}, Passed: {len(result.passed)}")
+
+
+
+def _load_engine():
+    import ff_analysis  # noqa: F401
+
+
+def _probe_startup(app, path):
+    """Record when the window is first mapped and when the engine has loaded, then quit."""
+    times = {"first_window": None}
+
+    def on_map(event):
+        if event.widget is app and times["first_window"] is None:
+            times["first_window"] = time.time()
+            app.after(1, wait_engine)
+
+    def wait_engine():
+        if app._loader.is_alive():
+            app.after(5, wait_engine)
+            return
+        times["engine_ready"] = time.time()
+        import json
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(times, f)
+        app.destroy()
+
+    app.bind("<Map>", on_map, add="+")
+
 
-        if under_max:
-            self.text.insert(tk.END, "\nUnder-max examples:\n")
-            for img_name, val, _ in under_max[:200]:
-                self.text.insert(tk.END, f"  {img_name} -> {val}\n")
+def main():
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # crop workers re-launch the frozen EXE
+    app = App()
+    probe = os.environ.get("FF_BLOB_STARTUP_PROBE")
+    if probe:
+        _probe_startup(app, probe)
+    app.mainloop()
 
-        messagebox.showinfo(APP_TITLE, f"Done. Under-max: {len(under_max)}, Passed: {len(passed)}")
 
 if __name__ == "__main__":
-    App().mainloop()
+    main()
@@ -0,0 +1,175 @@
+"""Command-line entry point for the FastForward Blob Checker.
+
+Runs the same analysis as the GUI without creating a Tk window, e.g.:
+
+    python ff_blob_cli.py FastForward_N123_cam2.csv --expected 9 --execute --copy
+
+With --follow it keeps watching a CSV that is still being written and only
+handles newly appended rows (see ff_follow.py). With --batch it analyzes every
+export under the given folders/globs in parallel (see ff_batch.py):
+
+    python ff_blob_cli.py --batch exports/ --aggregate aggregate_failed --execute
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from crop import CropGeometry
+from ff_analysis import AnalysisError, AnalysisOptions, format_summary, run_analysis
+from ff_stats import DEFAULT_BIN_WIDTH, format_histogram
+from ff_transfer import DEFAULT_WORKERS
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Analyze a FastForward CSV export for under-max blob results.")
+    p.add_argument("paths", nargs="+", metavar="csv_path",
+                   help="FastForward_<recipe>_<camera>.csv to analyze (with --batch: folders, globs or files)")
+    p.add_argument("--expected", type=int, default=9, help="expected BlobNumResults (max), default 9")
+    p.add_argument("--img-dir", default="", help="source images folder (default: one level above the CSV)")
+    p.add_argument("--failed-dir", default="", help="destination folder (default: same folder as the CSV)")
+    p.add_argument("--execute", action="store_true", help="move/copy the affected images (default: analyze only)")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--move", dest="action_mode", action="store_const", const="move", help="move images (default)")
+    mode.add_argument("--copy", dest="action_mode", action="store_const", const="copy", help="copy images instead of moving")
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                   help=f"parallel file transfers during --execute (default {DEFAULT_WORKERS})")
+    p.add_argument("--save-logs", action="store_true", help="write analysis_log_<ts>.csv next to the CSV")
+    p.add_argument("--separate-by-model", action="store_true", help="separate failed folders by model number")
+    p.add_argument("--save-passed", action="store_true", help="also save passing images (1-top / 2-bottom / mixed)")
+    p.add_argument("--no-crops", dest="extract_crops", action="store_false", help="skip writing per-blob crops")
+    p.add_argument("--crop-workers", type=int, default=None, help="crop processes (default: CPU count, 1 = in-process)")
+    geo = CropGeometry()
+    p.add_argument("--crop-width", type=int, default=geo.width, help=f"crop box width in px (default {geo.width})")
+    p.add_argument("--crop-height", type=int, default=geo.height, help=f"crop box height in px (default {geo.height})")
+    p.add_argument("--crop-pos-y", type=int, default=geo.pos_y,
+                   help=f"vertical crop centre when the export has no BlobPositionY0N (default {geo.pos_y})")
+    p.add_argument("--crop-pos-scale", type=int, default=geo.pos_scale,
+                   help=f"divisor applied to BlobPosition values (default {geo.pos_scale})")
+    p.add_argument("--engine", choices=("python", "numpy", "auto"), default="python",
+                   help="classification engine: streaming Python, NumPy columnar, or numpy when installed")
+    p.add_argument("--area-stats", choices=("exact", "streaming"), default="exact",
+                   help="exact quantiles (keeps every area) or streaming P² estimates (constant memory)")
+    p.add_argument("--area-bin-width", type=int, default=DEFAULT_BIN_WIDTH,
+                   help=f"blob-area histogram bin width in px (default {DEFAULT_BIN_WIDTH})")
+    p.add_argument("--histogram", action="store_true", help="print the blob-area histogram")
+    p.add_argument("--max-examples", type=int, default=200, help="under-max examples to print")
+    p.add_argument("--no-index-cache", dest="index_cache", action="store_false",
+                   help="always re-list the source images folder instead of reusing a cached listing")
+    p.add_argument("--no-cache", dest="result_cache", action="store_false",
+                   help="re-analyze even if this CSV was analyzed before with the same settings")
+    p.add_argument("--no-resume", dest="resume", action="store_false",
+                   help="start new failed_<ts>/passed_<ts> folders instead of resuming an earlier execute run")
+    p.add_argument("--no-history", dest="history", action="store_false",
+                   help="do not record the run in the run-history database (query it with ff_history.py)")
+    p.add_argument("--history-db", default="", metavar="PATH", help="run-history database (default: user cache folder)")
+    p.add_argument("--profile", action="store_true", help="dump cProfile stats to analysis_profile_<ts>.prof next to the CSV")
+    batch = p.add_argument_group("batch mode")
+    batch.add_argument("--batch", action="store_true", help="analyze every export found under the given paths")
+    batch.add_argument("--aggregate", default="", metavar="DIR",
+                       help="move/copy failed images into DIR/<model>/<recipe>_<camera>/ instead of failed_<ts>/")
+    batch.add_argument("--batch-workers", type=int, default=None, help="exports analyzed in parallel (default: CPU count)")
+    batch.add_argument("--report-dir", default=".", help="where batch_summary_<ts>.csv / batch_log_<ts>.csv go (default: .)")
+    follow = p.add_argument_group("follow mode")
+    follow.add_argument("--follow", action="store_true", help="keep watching the CSV and handle appended rows")
+    follow.add_argument("--interval", type=float, default=5.0, help="seconds between polls (default 5)")
+    follow.add_argument("--settle", type=int, default=1,
+                        help="later images that must appear before an image's verdict is final (default 1)")
+    follow.add_argument("--once", action="store_true", help="poll once and exit (for scheduled jobs)")
+    follow.add_argument("--flush", action="store_true", help="on exit, treat all pending images as final")
+    p.set_defaults(action_mode="move")
+    return p
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.batch and len(args.paths) != 1:
+        parser.error("pass exactly one CSV, or use --batch for several")
+    opts = AnalysisOptions(
+        csv_path=args.paths[0],
+        img_src_dir=args.img_dir,
+        failed_dir=args.failed_dir,
+        expected_max=args.expected,
+        action_mode=args.action_mode,
+        save_logs=args.save_logs,
+        separate_by_model=args.separate_by_model,
+        save_passed=args.save_passed,
+        extract_crops=args.extract_crops,
+        execute=args.execute,
+        transfer_workers=args.workers,
+        crop_workers=args.crop_workers,
+        crop_geometry=CropGeometry(args.crop_width, args.crop_height, args.crop_pos_y, args.crop_pos_scale),
+        area_exact=args.area_stats == "exact",
+        area_bin_width=args.area_bin_width,
+        engine=args.engine,
+        profile=args.profile,
+        index_cache=args.index_cache,
+        result_cache=args.result_cache,
+        resume=args.resume,
+        history=args.history,
+        history_path=args.history_db,
+        pause_gc=True,  # nothing else runs in this process
+    )
+    try:
+        if args.batch:
+            return batch(opts, args)
+        if args.follow:
+            return follow(opts, args)
+        result = run_analysis(opts)
+    except AnalysisError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    sys.stdout.write(format_summary(result, max_examples=args.max_examples))
+    if args.histogram and result.area_histogram:
+        sys.stdout.write("\nBlob area histogram:\n" + format_histogram(result.area_histogram, result.area_bin_width))
+    return 0
+
+
+def _print_actions(actions):
+    for img_name, val, _, kind, action, note in actions:
+        extra = f" [{action}{': ' + note if note else ''}]" if action else ""
+        print(f"  {kind}: {img_name} -> {val}{extra}", flush=True)
+
+
+def batch(opts, args):
+    from ff_batch import find_exports, format_batch_summary, run_batch, write_batch_report
+
+    paths = find_exports(args.paths)
+    if not paths:
+        print("error: no FastForward_*.csv exports found", file=sys.stderr)
+        return 2
+
+    def progress(done, total, summary):
+        status = "ERROR" if summary.error else f"{summary.failed} under-max"
+        print(f"[{done}/{total}] {summary.csv_path}: {status}", flush=True)
+
+    summaries = run_batch(paths, opts, aggregate_dir=args.aggregate, workers=args.batch_workers, progress=progress)
+    summary_path, log_path = write_batch_report(summaries, args.report_dir)
+    sys.stdout.write("\n" + format_batch_summary(summaries))
+    print(f"\nSummary written to: {summary_path}\nLog written to: {log_path}")
+    return 1 if any(s.error for s in summaries) else 0
+
+
+def follow(opts, args):
+    from ff_follow import Follower
+
+    follower = Follower(opts, settle=args.settle)
+    print(f"Following {follower.csv_path} (state: {follower.state_path}, offset {follower.offset})", flush=True)
+    try:
+        while True:
+            _print_actions(follower.poll())
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass  # the state saved by the last completed poll is consistent
+    if args.flush:
+        _print_actions(follower.flush())
+    sys.stdout.write(follower.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
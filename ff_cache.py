@@ -0,0 +1,123 @@
+"""Persistent cache of classification results, so re-analyzing an unchanged export is instant.
+
+Operators typically run "Analyze" and then "Analyze & Execute" on the same
+CSV, or reopen yesterday's exports. run_analysis() stores what the
+classification phase produced (failed/passed lists, row/image counts, blob
+area statistics) under a key built from the CSV path, size, mtime and a
+content hash plus every setting that changes the result, and on a hit goes
+straight to the execute phase.
+
+Entries live in one SQLite file in the user cache folder (see
+ff_index.default_cache_dir) as zlib-compressed JSON, and the least recently
+used ones are evicted once the payloads exceed max_bytes in total. Cache
+errors are never fatal: a broken or locked cache just means a normal run.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from ff_index import default_cache_dir
+
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    """blake2b hex digest of a file's content."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def make_key(**parts):
+    """Stable key for the given JSON-serializable parts (order does not matter)."""
+    parts["version"] = CACHE_VERSION
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed key -> JSON payload store with LRU eviction by total payload size."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(default_cache_dir(), "results.sqlite")
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, csv_path TEXT, size INTEGER, mtime_ns INTEGER, content_hash TEXT,
+            created REAL, last_used REAL, nbytes INTEGER, payload BLOB)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._db.commit()
+
+    def get(self, key):
+        """Payload stored under key, or None (also when the cache cannot be read)."""
+        try:
+            row = self._db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                payload = json.loads(zlib.decompress(row[0]).decode("utf-8"))
+            except (zlib.error, ValueError):
+                with self._db:
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            with self._db:
+                self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+            return payload
+        except sqlite3.Error:
+            return None
+
+    def put(self, key, payload, csv_path="", size=0, mtime_ns=0, content_hash=""):
+        """Store payload under key and evict old entries; returns the stored size (0 if it failed)."""
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+        now = time.time()
+        try:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (key, csv_path, size, mtime_ns, content_hash, now, now, len(blob), blob))
+                self._evict()
+        except sqlite3.Error:
+            return 0
+        return len(blob)
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, nbytes in self._db.execute("SELECT key, nbytes FROM results ORDER BY last_used").fetchall():
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= nbytes
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """(entries, total payload bytes)."""
+        return tuple(self._db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM results").fetchone())
+
+    def clear(self):
+        with self._db:
+            self._db.execute("DELETE FROM results")
+        self._db.execute("VACUUM")
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_cache(path=None, max_bytes=DEFAULT_MAX_BYTES):
+    """ResultCache, or None when the cache file cannot be opened (read-only profile, locked, corrupt)."""
+    try:
+        return ResultCache(path, max_bytes)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,250 @@
+"""Optional NumPy columnar engine for large exports.
+
+Selected with AnalysisOptions.engine = "numpy" (or "auto"), --engine on the
+CLI. Instead of folding every row into Python tallies, the needed columns are
+read in chunks and dictionary-encoded (each distinct string is parsed once,
+with the same rules as the Python path), then verdicts, 1-top/2-bottom/mixed
+categories and blob areas are computed with grouped NumPy reductions over
+the image codes. Results are identical to ff_analysis.scan_export(); with
+streaming area stats the areas are fed in row order so the P² estimates
+match too.
+
+NumPy is not a hard dependency: numpy_available() reports whether this
+engine can be used.
+"""
+import csv
+import os
+import time
+from array import array
+from itertools import islice, zip_longest
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+from crop import CropPool
+from ff_analysis import (PROGRESS_EVERY, AnalysisCancelled, AnalysisError, ScanResult, blob_crops,
+                         extract_model_from_name, open_export, to_float)
+from ff_stats import AreaStats
+
+CHUNK_ROWS = 50 * PROGRESS_EVERY
+
+
+def numpy_available():
+    return np is not None
+
+
+class _Factor:
+    """Dictionary-encodes one column: distinct strings -> int codes in first-seen order, chunk by chunk."""
+
+    def __init__(self):
+        self.index = {}
+        self.codes = array("i")
+
+    def extend(self, values):
+        idx = self.index
+        for v in dict.fromkeys(values):  # distinct values of the chunk, first-seen order
+            if v not in idx:
+                idx[v] = len(idx)
+        self.codes.extend(map(idx.__getitem__, values))
+
+    def uniques(self):
+        return list(self.index)
+
+    def code_array(self):
+        return np.frombuffer(self.codes, dtype=np.intc) if self.codes else np.zeros(0, dtype=np.intc)
+
+
+def _parse_int(s):
+    try:
+        return int(s), True
+    except (ValueError, TypeError):
+        return 0, False
+
+
+def _label_class(s):
+    """0 = empty, 1 = "1", 2 = "2", 3 = any other ModelNumber value."""
+    s = s.strip()
+    if not s:
+        return 0
+    return {"1": 1, "2": 2}.get(s, 3)
+
+
+def _group_any(codes, mask, n):
+    return np.bincount(codes[mask], minlength=n) > 0
+
+
+def scan_export_columnar(opts, csv_path, failed_dir, report, cancelled, metrics, index):
+    """Columnar counterpart of ff_analysis.scan_export(); same inputs and ScanResult."""
+    base_model = extract_model_from_name(os.path.basename(csv_path), "Unknown")
+    total_rows = 0
+    crops_written = 0
+    models = set()
+    clock = time.perf_counter
+    parse_s = crop_s = 0.0
+    try:
+        with open(csv_path, "r", newline="", encoding="utf-8", errors="ignore") as f, \
+                CropPool(opts.crop_workers if opts.extract_crops else 1) as crop_pool:
+            cols, rows = open_export(f)
+            wanted = {"image": cols.image, "search_max": cols.search_max, "results": cols.results}
+            for i, idx in enumerate(cols.area):
+                wanted[("area", i)] = idx
+            for i, idx in enumerate(cols.model):
+                wanted[("model", i)] = idx
+            if opts.save_passed:
+                for idx in cols.model_labels:
+                    wanted[("label", idx)] = idx
+            factors = {key: _Factor() for key in wanted}
+            present = sorted({idx for idx in wanted.values() if idx is not None})
+            project = itemgetter(*present) if len(present) > 1 else (lambda row: tuple(row[i] for i in present))
+            max_idx = present[-1] if present else -1
+
+            while True:
+                t0 = clock()
+                chunk = list(islice(rows, CHUNK_ROWS))
+                if not chunk:
+                    break
+                if cancelled():
+                    raise AnalysisCancelled("Analysis cancelled.")
+                if min(map(len, chunk)) > max_idx:
+                    columns = dict(zip(present, zip(*map(project, chunk))))  # only the wanted columns
+                else:
+                    padded = list(zip_longest(*chunk, fillvalue=""))  # short rows padded with ""
+                    columns = {idx: padded[idx] for idx in present if idx < len(padded)}
+                blank = ("",) * len(chunk)
+                for key, idx in wanted.items():
+                    factors[key].extend(columns.get(idx, blank))
+                t1 = clock()
+                parse_s += t1 - t0
+                if opts.extract_crops:
+                    for row in chunk:
+                        try:
+                            int(cols.cell(row, cols.search_max))
+                            val = to_float(cols.cell(row, cols.results))
+                            if val != val:  # NaN
+                                continue
+                            image_path, crops = blob_crops(int(val), cols, row, failed_dir, opts.crop_geometry,
+                                                           models, index)
+                            crop_pool.submit(image_path, crops)
+                        except Exception:
+                            continue
+                    report("crop", crop_pool.written)
+                crop_s += clock() - t1
+                total_rows += len(chunk)
+                report("parse", total_rows)
+            parse_s += clock() - t0  # the final, empty read
+            t0 = clock()
+            crops_written = crop_pool.close()
+            crop_s += clock() - t0
+    except (OSError, csv.Error) as e:
+        raise AnalysisError(f"Failed to parse CSV:\n{e}")
+    report("parse", total_rows, total_rows)
+    if opts.extract_crops:
+        report("crop", crops_written, crops_written)
+    metrics.add("parse", "rows", parse_s, total_rows, os.path.getsize(csv_path))
+    t0 = clock()
+
+    # -- per-row values (each distinct string parsed once) --------------------
+    sm_u = [_parse_int(s) for s in factors["search_max"].uniques()]
+    sm_ok = np.array([ok for _, ok in sm_u], dtype=bool)[factors["search_max"].code_array()] if sm_u else np.zeros(0, bool)
+    expected_max = opts.expected_max
+    if sm_ok.any():
+        last = int(np.flatnonzero(sm_ok)[-1])
+        expected_max = sm_u[factors["search_max"].codes[last]][0]
+
+    res_u = factors["results"].uniques()
+    res_codes = factors["results"].code_array()
+    nonempty = np.array([bool(s) for s in res_u], dtype=bool)[res_codes] if res_u else np.zeros(0, bool)
+    val = np.array([to_float(s) for s in res_u], dtype=float)[res_codes] if res_u else np.zeros(0)
+
+    # -- per-image verdicts ---------------------------------------------------
+    names = factors["image"].uniques()
+    img = factors["image"].code_array()
+    has_name = np.array([bool(n) for n in names], dtype=bool)
+    n_img = len(names)
+    named = has_name[img] if n_img else np.zeros(0, bool)
+    isnan = np.isnan(val)
+
+    counted = named & nonempty
+    count = np.bincount(img[counted], minlength=n_img)
+    bad = _group_any(img, counted & isnan, n_img)
+    numeric = counted & ~isnan
+    has_val = _group_any(img, numeric, n_img)
+    mins = np.full(n_img, np.inf)
+    maxs = np.full(n_img, -np.inf)
+    np.minimum.at(mins, img[numeric], val[numeric])
+    np.maximum.at(maxs, img[numeric], val[numeric])
+
+    under = has_val & (mins < expected_max)
+    passed_mask = ~under & ~bad & ((count == 0) | (has_val & (mins == maxs) & (mins == expected_max)))
+    under &= has_name
+    passed_mask &= has_name
+
+    def model_of(name):
+        return extract_model_from_name(name, base_model) if opts.separate_by_model else ""
+
+    under_max = [(names[i], float(mins[i]), model_of(names[i])) for i in np.flatnonzero(under)]
+    passed = []
+    if opts.save_passed:
+        any_cls = np.zeros((4, n_img), dtype=bool)
+        for key, factor in factors.items():
+            if not (isinstance(key, tuple) and key[0] == "label"):
+                continue
+            cls_u = np.array([_label_class(s) for s in factor.uniques()], dtype=np.int8)
+            cls = cls_u[factor.code_array()] if len(cls_u) else np.zeros(0, np.int8)
+            for c in (1, 2, 3):
+                any_cls[c] |= _group_any(img, named & (cls == c), n_img)
+        for i in np.flatnonzero(passed_mask):
+            if any_cls[1][i] and not any_cls[2][i] and not any_cls[3][i]:
+                cat = "1-top"
+            elif any_cls[2][i] and not any_cls[1][i] and not any_cls[3][i]:
+                cat = "2-bottom"
+            else:
+                cat = "mixed"
+            passed.append((names[i], expected_max, model_of(names[i]), cat))
+
+    metrics.add("classify", "images", clock() - t0, int(has_name.sum()))
+    t0 = clock()
+
+    # -- blob areas -----------------------------------------------------------
+    area_stats = AreaStats(exact=opts.area_exact, bin_width=opts.area_bin_width)
+    row_ok = sm_ok & np.isfinite(val)
+    num = np.where(row_ok, np.trunc(np.where(row_ok, val, 0)), 0).astype(np.int64)
+    label_ids = {}
+    picked_rows, picked_slots, picked_areas, picked_labels = [], [], [], []
+    for i in range(len(cols.area)):
+        a_factor, m_factor = factors[("area", i)], factors[("model", i)]
+        a_u = [_parse_int(s) for s in a_factor.uniques()]
+        if not a_u:
+            continue
+        a_codes = a_factor.code_array()
+        a_ok = np.array([ok for _, ok in a_u], dtype=bool)[a_codes]
+        a_val = np.array([v for v, _ in a_u], dtype=np.int64)[a_codes]
+        sel = np.flatnonzero(row_ok & (num > i) & a_ok)
+        if not len(sel):
+            continue
+        lab_u = np.array([label_ids.setdefault(m.strip(), len(label_ids)) for m in m_factor.uniques()], dtype=np.intc)
+        picked_rows.append(sel)
+        picked_slots.append(np.full(len(sel), i))
+        picked_areas.append(a_val[sel])
+        picked_labels.append(lab_u[m_factor.code_array()[sel]])
+    if picked_rows:
+        areas = np.concatenate(picked_areas)
+        labels = np.concatenate(picked_labels)
+        names_by_id = list(label_ids)
+        if opts.area_exact:
+            for lid in np.unique(labels).tolist():
+                buf = array("i")
+                buf.frombytes(areas[labels == lid].astype(np.intc).tobytes())
+                area_stats.add_many(buf, names_by_id[lid])
+        else:
+            order = np.lexsort((np.concatenate(picked_slots), np.concatenate(picked_rows)))  # row, then blob order
+            for a, lid in zip(areas[order].tolist(), labels[order].tolist()):
+                area_stats.add(a, names_by_id[lid])
+
+    metrics.add("area", "blobs", clock() - t0)
+    if opts.extract_crops:
+        metrics.add("crop", "crops", crop_s, crops_written)
+    return ScanResult(total_rows, expected_max, int(has_name.sum()), under_max, passed, area_stats, crops_written)
@@ -0,0 +1,304 @@
+"""Tail-follow mode for FastForward exports that are still being written.
+
+The vision application keeps appending rows to its CSV during production.
+A Follower remembers the byte offset and header it has already consumed,
+parses only newly appended complete lines on each poll (a partial trailing
+line is left for the next poll), and keeps per-image tallies up to date.
+
+An image's verdict is treated as final once rows for `settle` other images
+have been appended after its last row (the application writes an image's
+rows together). Only final images are cropped, moved or copied. Final images
+are remembered for DONE_WINDOW settle windows to ignore late rows, then
+forgotten, so the state stays small however long production runs. Everything
+needed to resume lives in a small JSON sidecar next to the CSV
+(<csv>.follow.json), so a restart continues from the last offset.
+"""
+import csv
+import io
+import json
+import os
+import time
+
+from crop import CropPool
+from ff_analysis import (CsvColumns, ImageTally, blob_crops, classify_tally, destination_dir,
+                         extract_model_from_name, parse_blob_area, resolve_dirs, tally_row, to_float,
+                         write_log)
+from ff_stats import AreaStats
+from ff_transfer import TransferJob, transfer_files
+
+STATE_VERSION = 3
+DONE_WINDOW = 4  # settle windows a final image is remembered for
+
+
+def _tally_to_list(t):
+    return [t.count, t.bad, t.min_val, t.max_val, t.label]
+
+
+def _tally_from_list(values):
+    t = ImageTally()
+    t.count, t.bad, t.min_val, t.max_val, t.label = values
+    return t
+
+
+class Follower:
+    """Incrementally analyzes one growing export. See the module docstring."""
+
+    def __init__(self, opts, settle=1, state_path=None):
+        self.opts = opts
+        self.csv_path, self.img_src_dir, self.failed_dir = resolve_dirs(opts.csv_path, opts.img_src_dir, opts.failed_dir)
+        self.settle = max(int(settle), 1)
+        self.state_path = state_path or self.csv_path + ".follow.json"
+        self.base_model = extract_model_from_name(os.path.basename(self.csv_path), "Unknown")
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.offset = 0
+        self.metadata = None       # first line of the export, used to notice a replaced file
+        self.header = None
+        self.cols = None
+        self.expected_max = self.opts.expected_max
+        self.ts = time.strftime("%Y%m%d_%H%M%S")
+        self.rows = 0
+        self.seq = 0               # bumps whenever a row belongs to a different image than the previous row
+        self.last_image = None
+        self.pending = {}          # img -> ImageTally, verdict not final yet
+        self.last_seq = {}         # img -> seq of its latest row
+        self.pending_crops = {}    # img -> [[image_path, [[blob_path, box], ...]], ...]
+        self.done = {}             # img -> seq of its last row, for recent final images only
+        self.final = 0             # final images so far
+        self.failed = 0
+        self.passed = 0
+        self.area = AreaStats(exact=False, bin_width=self.opts.area_bin_width)  # constant memory
+        self.models = set()
+        self.moved = 0
+        self.missing = 0
+        self.crops_written = 0
+
+    @property
+    def log_path(self):
+        if not self.opts.save_logs:
+            return None
+        return os.path.join(os.path.dirname(self.csv_path), f"analysis_log_follow_{self.ts}.csv")
+
+    # -- persistence -------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                st = json.load(f)
+        except (OSError, ValueError):
+            return
+        if st.get("version") not in (2, STATE_VERSION) or st.get("csv_path") != os.path.abspath(self.csv_path):
+            return
+        self.offset = st["offset"]
+        self.metadata = st["metadata"]
+        self.header = st["header"]
+        self.cols = CsvColumns(self.header) if self.header is not None else None
+        self.expected_max = st["expected_max"]
+        self.ts = st["ts"]
+        self.rows = st["rows"]
+        self.seq = st["seq"]
+        self.last_image = st["last_image"]
+        self.pending = {img: _tally_from_list(v) for img, v in st["pending"].items()}
+        self.last_seq = st["last_seq"]
+        self.pending_crops = st["pending_crops"]
+        if st["version"] == 2:  # done held every final image with its verdict
+            self.done = {img: self.seq for img in st["done"]}
+            self.final = len(st["done"])
+        else:
+            self.done = st["done"]
+            self.final = st["final"]
+        self.failed = st["failed"]
+        self.passed = st["passed"]
+        self.area = AreaStats.from_state(st["area"])
+        self.models = set(st["models"])
+        self.moved = st["moved"]
+        self.missing = st["missing"]
+        self.crops_written = st["crops_written"]
+
+    def save(self):
+        st = {
+            "version": STATE_VERSION,
+            "csv_path": os.path.abspath(self.csv_path),
+            "offset": self.offset,
+            "metadata": self.metadata,
+            "header": self.header,
+            "expected_max": self.expected_max,
+            "ts": self.ts,
+            "rows": self.rows,
+            "seq": self.seq,
+            "last_image": self.last_image,
+            "pending": {img: _tally_to_list(t) for img, t in self.pending.items()},
+            "last_seq": self.last_seq,
+            "pending_crops": self.pending_crops,
+            "done": self.done,
+            "final": self.final,
+            "failed": self.failed,
+            "passed": self.passed,
+            "area": self.area.to_state(),
+            "models": sorted(self.models),
+            "moved": self.moved,
+            "missing": self.missing,
+            "crops_written": self.crops_written,
+        }
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(st, f, separators=(",", ":"))
+        os.replace(tmp, self.state_path)
+
+    # -- reading -----------------------------------------------------------
+
+    def _read_new_text(self):
+        """Return newly appended complete lines as text, advancing the offset past them."""
+        size = os.path.getsize(self.csv_path)
+        with open(self.csv_path, "rb") as f:
+            if self.metadata is not None:
+                first = f.readline().decode("utf-8", errors="ignore")
+                if size < self.offset or first != self.metadata:
+                    # truncated or replaced by a new export: start over
+                    self._reset()
+            if size == self.offset:
+                return ""
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b"\n")
+        if end < 0:
+            return ""
+        self.offset += end + 1
+        return data[:end + 1].decode("utf-8", errors="ignore")
+
+    def _consume(self, text):
+        buf = io.StringIO(text, newline="")
+        if self.metadata is None:
+            self.metadata = buf.readline()
+        reader = csv.reader(buf, delimiter=";")
+        if self.header is None:
+            self.header = next(reader, None)
+            if self.header is None:
+                return
+            self.cols = CsvColumns(self.header)
+        cols = self.cols
+        for row in reader:
+            if not row:
+                continue
+            self.rows += 1
+            img = cols.cell(row, cols.image)
+            if not img:
+                continue
+            if img != self.last_image:
+                self.seq += 1
+                self.last_image = img
+            if img in self.done:
+                continue  # late row for an image that was already handled
+            tally_row(self.pending, cols, row, self.opts.save_passed)
+            self.last_seq[img] = self.seq
+            try:
+                self.expected_max = int(cols.cell(row, cols.search_max))
+                val = to_float(cols.cell(row, cols.results))
+                if val != val:  # NaN
+                    continue
+                parse_blob_area(int(val), cols, row, self.area)  # before the crops, as in scan_export
+                if self.opts.extract_crops:
+                    image_path, crops = blob_crops(int(val), cols, row, self.failed_dir,
+                                                   self.opts.crop_geometry, self.models)
+                    self.pending_crops.setdefault(img, []).append([image_path, crops])
+            except Exception:
+                continue
+
+    # -- finalizing --------------------------------------------------------
+
+    def _finalize(self, images):
+        if not images:
+            return []
+        if self.opts.extract_crops:
+            with CropPool(self.opts.crop_workers) as pool:
+                for img in images:
+                    for image_path, crops in self.pending_crops.pop(img, []):
+                        pool.submit(image_path, [(out, tuple(box)) for out, box in crops])
+                self.crops_written += pool.close()
+
+        sep = self.opts.separate_by_model
+        planned = []
+        for img in images:
+            t = self.pending.pop(img)
+            self.done[img] = self.last_seq.pop(img, self.seq)
+            self.final += 1
+            self.pending_crops.pop(img, None)
+            verdict = classify_tally(img, t, self.expected_max, self.base_model, sep)
+            if verdict is None:
+                continue
+            kind, item = verdict
+            if kind == "failed":
+                self.failed += 1
+                planned.append(([img, item[1], item[2], "failed"],
+                                destination_dir(self.failed_dir, self.ts, item[2], sep)))
+            else:
+                self.passed += 1
+                if self.opts.save_passed:
+                    cat = item[3]
+                    planned.append(([img, item[1], item[2], f"passed-{cat}"],
+                                    destination_dir(self.failed_dir, self.ts, item[2], sep, cat)))
+
+        if not self.opts.execute:
+            actions = [row + ["", ""] for row, _ in planned]
+        else:
+            jobs = [TransferJob(os.path.join(self.img_src_dir, row[0]), sub, row[0]) for row, sub in planned]
+            outcomes = transfer_files(jobs, mode=self.opts.action_mode, workers=self.opts.transfer_workers)
+            actions = []
+            for (row, _), (action, note) in zip(planned, outcomes):
+                if action in ("moved", "copied"):
+                    self.moved += 1
+                elif action == "missing":
+                    self.missing += 1
+                actions.append(row + [action, note])
+        if self.log_path and actions:
+            write_log(self.log_path, actions, append=True)
+        return actions
+
+    def poll(self):
+        """Consume newly appended lines, handle images whose verdict became final and save the state.
+
+        Returns the action rows ([img_name, val, model, kind, action, note]) handled by this poll.
+        """
+        text = self._read_new_text()
+        if text:
+            self._consume(text)
+        final = [img for img in self.pending if self.seq - self.last_seq[img] >= self.settle]
+        actions = self._finalize(final)
+        self._forget_done()
+        if text or actions:
+            self.save()
+        return actions
+
+    def _forget_done(self):
+        """Drop final images whose last row is more than DONE_WINDOW settle windows back."""
+        oldest = self.seq - DONE_WINDOW * self.settle
+        if self.done and min(self.done.values()) < oldest:
+            self.done = {img: seq for img, seq in self.done.items() if seq >= oldest}
+
+    def flush(self):
+        """Treat every pending image as final (e.g. once production has stopped)."""
+        actions = self._finalize(list(self.pending))
+        self.save()
+        return actions
+
+    def summary(self):
+        lines = [
+            f"CSV: {self.csv_path}",
+            f"Rows read: {self.rows} (offset {self.offset})",
+            f"Expected max: {self.expected_max}",
+            f"Final images: {self.final}, pending: {len(self.pending)}",
+            f"Under-max count: {self.failed}",
+            f"Passed count: {self.passed}",
+        ]
+        area = self.area.summary()
+        if area is not None:
+            lines.append(f"Blob area (all, approx. quantiles): {area.describe()}")
+        if self.opts.extract_crops:
+            lines.append(f"Crops written: {self.crops_written}")
+        if self.opts.execute:
+            lines.append(f"Action: {self.opts.action_mode}")
+            lines.append(f"Processed: {self.moved}, Missing: {self.missing}")
+        lines.append(f"Log written to: {self.log_path}" if self.log_path else "Log saving disabled.")
+        return "\n".join(lines) + "\n"
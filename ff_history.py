@@ -0,0 +1,274 @@
+"""Run history: every analysis recorded in one SQLite database, for trends across exports.
+
+run_analysis() records each run here (AnalysisOptions.history): one row in
+`runs` (export, recipe/camera/model, counts, what the execute phase did),
+one row per handled image in `images` (verdict, BlobNumResults, action) and
+the blob-area summaries in `areas` (blob_model NULL = all blobs). Everything
+of one run goes in with bulk inserts in a single transaction.
+
+Runs that moved or copied images (executed) are kept, since their images
+rows are the record of what was done. A run that only analyzed supersedes
+earlier analyze-only runs of the same CSV (also from before the export
+grew), and is not recorded at all when an executed run already covers the
+same export state (export_key: absolute path, size and mtime of the CSV).
+Rates and image lists use the latest run per CSV, so every export counts
+once; `images --all-runs` also lists older executed runs. Recipe and
+camera come from the CSV name (parse_export_name), the model from
+extract_model_from_name, timestamps are local ISO strings
+(2026-10-17T14:03:55), so a month is simply ts >= '2026-10' AND ts < '2026-11'.
+
+Passed images are only listed when the run saved them (save_passed); rates
+use the per-run image counts, which always cover every image.
+
+Query or export from the command line:
+
+    python ff_history.py rates --model N123 --camera cam2 --since 2026-10 --by day
+    python ff_history.py images --verdict failed --since 2026-10-01 --csv failed_october.csv
+    python ff_history.py runs --recipe N123 --limit 20
+
+The database lives in the user cache folder (ff_index.default_cache_dir) as
+history.sqlite; FF_BLOB_HISTORY or --db point elsewhere.
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+
+from ff_index import default_cache_dir
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, ts TEXT, csv_path TEXT, recipe TEXT, camera TEXT, model TEXT,
+    expected_max INTEGER, total_rows INTEGER, images INTEGER, failed INTEGER, passed INTEGER,
+    executed INTEGER, action_mode TEXT, moved INTEGER, missing INTEGER, cancelled INTEGER, cache_hit INTEGER,
+    export_key TEXT);
+CREATE INDEX IF NOT EXISTS runs_ts ON runs (ts);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, ts);
+CREATE INDEX IF NOT EXISTS runs_camera ON runs (camera, recipe, ts);
+CREATE TABLE IF NOT EXISTS images (
+    run_id INTEGER, ts TEXT, recipe TEXT, camera TEXT, model TEXT, image TEXT, verdict TEXT,
+    category TEXT, blob_count INTEGER, action TEXT, note TEXT);
+CREATE INDEX IF NOT EXISTS images_image ON images (image);
+CREATE INDEX IF NOT EXISTS images_model ON images (model, ts);
+CREATE INDEX IF NOT EXISTS images_camera ON images (camera, recipe, ts);
+CREATE INDEX IF NOT EXISTS images_ts ON images (ts);
+CREATE TABLE IF NOT EXISTS areas (
+    run_id INTEGER, blob_model TEXT, count INTEGER, mean REAL, std REAL, min INTEGER, max INTEGER,
+    p1 REAL, p5 REAL, p50 REAL, p95 REAL, p99 REAL);
+CREATE INDEX IF NOT EXISTS areas_run ON areas (run_id);
+"""
+EXPORT_INDEX = "CREATE INDEX IF NOT EXISTS runs_export ON runs (export_key)"
+
+# --by choices for rates -> SQL expression over runs
+GROUPS = {"model": "model", "recipe": "recipe", "camera": "camera",
+          "day": "substr(ts, 1, 10)", "month": "substr(ts, 1, 7)"}
+
+
+def default_history_path():
+    return os.environ.get("FF_BLOB_HISTORY") or os.path.join(default_cache_dir(), "history.sqlite")
+
+
+def export_key(csv_path):
+    """Identity of one export: absolute path, size and mtime_ns of the CSV."""
+    st = os.stat(csv_path)
+    return f"{os.path.abspath(csv_path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+# runs that count: the latest one per CSV
+LATEST = "run_id IN (SELECT MAX(run_id) FROM runs GROUP BY csv_path)"
+
+
+def _where(model=None, recipe=None, camera=None, since=None, until=None, latest=False, **extra):
+    """SQL WHERE clause and parameters for the common filters (None = no filter)."""
+    clauses, params = [LATEST] if latest else [], []
+    for column, value in (("model", model), ("recipe", recipe), ("camera", camera), *extra.items()):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since:
+        clauses.append("ts >= ?")
+        params.append(since)
+    if until:
+        clauses.append("ts < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class RunHistory:
+    """The history database. See the module docstring for the tables."""
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")  # batch workers record runs concurrently
+        self._db.execute("PRAGMA synchronous=NORMAL")  # with WAL: still consistent after a crash, one fsync less
+        self._db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add export_key to a database written before runs were keyed by export.
+
+        Old runs get their CSV path as key; analyze-only runs other than the latest one
+        per CSV are dropped, matching what record() does from now on.
+        """
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(runs)")]
+        if "export_key" not in columns:
+            with self._db:
+                self._db.execute("ALTER TABLE runs ADD COLUMN export_key TEXT")
+                self._db.execute("UPDATE runs SET export_key = csv_path")
+                stale = f"SELECT run_id FROM runs WHERE executed = 0 AND NOT {LATEST}"
+                for table in ("images", "areas", "runs"):
+                    self._db.execute(f"DELETE FROM {table} WHERE run_id IN ({stale})")
+        self._db.execute(EXPORT_INDEX)
+
+    def record(self, result, ts, recipe, camera, model, key=None):
+        """Store one AnalysisResult in a single transaction; returns its run_id.
+
+        Earlier analyze-only runs of the same CSV are replaced. An analyze-only result for an
+        export state (key, default export_key(result.csv_path)) that an executed run already
+        holds is not stored; that run's id is returned instead.
+        """
+        key = key or export_key(result.csv_path)
+        csv_path = os.path.abspath(result.csv_path)
+        with self._db:
+            if not result.executed:
+                row = self._db.execute("SELECT MAX(run_id) FROM runs WHERE export_key = ? AND executed = 1",
+                                       (key,)).fetchone()
+                if row[0] is not None:
+                    return row[0]
+            earlier = "SELECT run_id FROM runs WHERE csv_path = ? AND executed = 0"
+            for table in ("images", "areas", "runs"):
+                self._db.execute(f"DELETE FROM {table} WHERE run_id IN ({earlier})", (csv_path,))
+            cur = self._db.execute(
+                "INSERT INTO runs (ts, csv_path, recipe, camera, model, expected_max, total_rows, images, failed,"
+                " passed, executed, action_mode, moved, missing, cancelled, cache_hit, export_key)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ts, csv_path, recipe, camera, model, result.expected_max,
+                 result.total_rows, result.images, len(result.failed), len(result.passed), int(result.executed),
+                 result.action_mode if result.executed else "", result.moved_count, result.missing_count,
+                 int(result.cancelled), int(result.cache_hit), key))
+            run_id = cur.lastrowid
+            self._db.executemany(
+                "INSERT INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, ts, recipe, camera, img_model or model, img_name,
+                  "failed" if kind == "failed" else "passed", kind.partition("-")[2], val, action, note)
+                 for img_name, val, img_model, kind, action, note in result.actions))
+            summaries = [(None, result.area)] + list(result.area_by_model.items()) if result.area else []
+            self._db.executemany(
+                "INSERT INTO areas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id, blob_model, s.count, s.mean, s.std, s.min, s.max, s.p1, s.p5, s.p50, s.p95, s.p99)
+                 for blob_model, s in summaries))
+        return run_id
+
+    def rates(self, by=("model", "camera"), **filters):
+        """[(group values..., runs, images, under_max, rate), ...] over the latest run of each matching CSV."""
+        where, params = _where(latest=True, **filters)
+        keys = ", ".join(GROUPS[b] for b in by)
+        select = keys + ", " if keys else ""
+        group = f" GROUP BY {keys} ORDER BY {keys}" if keys else ""
+        rows = self._db.execute(f"SELECT {select}COUNT(*), SUM(images), SUM(failed) FROM runs{where}{group}",
+                                params).fetchall()
+        return [row + ((row[-1] / row[-2]) if row[-2] else 0.0,) for row in rows if row[-3]]
+
+    def runs(self, limit=None, **filters):
+        where, params = _where(**filters)
+        sql = f"SELECT * FROM runs{where} ORDER BY ts DESC" + (" LIMIT ?" if limit else "")
+        cur = self._db.execute(sql, params + ([limit] if limit else []))
+        return [d[0] for d in cur.description], cur.fetchall()
+
+    def images(self, image=None, verdict=None, limit=None, all_runs=False, **filters):
+        """Image rows of the latest run per CSV, or of every kept run with all_runs."""
+        where, params = _where(image=image, verdict=verdict, latest=not all_runs, **filters)
+        sql = f"SELECT * FROM images{where} ORDER BY ts, run_id" + (" LIMIT ?" if limit else "")
+        cur = self._db.execute(sql, params + ([limit] if limit else []))
+        return [d[0] for d in cur.description], cur.fetchall()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def record_run(result, ts, recipe, camera, model, path=None):
+    """Record result in the history; returns (run_id, path), or (None, path) if the database is unusable.
+
+    Like the result cache, the history never fails a run.
+    """
+    path = path or default_history_path()
+    try:
+        with RunHistory(path) as history:
+            return history.record(result, ts, recipe, camera, model), path
+    except (OSError, sqlite3.Error):
+        return None, path
+
+
+def _print_table(header, rows, out=sys.stdout):
+    rows = [["" if v is None else str(v) for v in row] for row in rows]
+    widths = [max([len(h)] + [len(r[i]) for r in rows]) for i, h in enumerate(header)]
+    out.write("  ".join(h.ljust(w) for h, w in zip(header, widths)).rstrip() + "\n")
+    for r in rows:
+        out.write("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip() + "\n")
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=None, help="history database (default: FF_BLOB_HISTORY or the user cache folder)")
+    common.add_argument("--model")
+    common.add_argument("--recipe")
+    common.add_argument("--camera")
+    common.add_argument("--since", help="from this ISO date/time prefix, e.g. 2026-10 or 2026-10-01")
+    common.add_argument("--until", help="before this ISO date/time prefix (exclusive)")
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = p.add_subparsers(dest="command", required=True)
+    rates = sub.add_parser("rates", parents=[common], help="under-max rate per group")
+    rates.add_argument("--by", default="model,camera", help=f"comma-separated, of {', '.join(GROUPS)} (default model,camera)")
+    for name, text in (("runs", "list recorded runs"), ("images", "list or export per-image verdicts")):
+        cmd = sub.add_parser(name, parents=[common], help=text)
+        cmd.add_argument("--limit", type=int, default=None)
+        cmd.add_argument("--csv", metavar="PATH", help="write the rows to a CSV file instead of printing them")
+        if name == "images":
+            cmd.add_argument("--image", help="exact image name")
+            cmd.add_argument("--verdict", choices=("failed", "passed"))
+            cmd.add_argument("--all-runs", action="store_true",
+                             help="also list older executed runs of a CSV, not only its latest run")
+    args = p.parse_args(argv)
+
+    filters = dict(model=args.model, recipe=args.recipe, camera=args.camera, since=args.since, until=args.until)
+    path = args.db or default_history_path()
+    if not os.path.exists(path):
+        print(f"error: no history at {path}", file=sys.stderr)
+        return 2
+    with RunHistory(path) as history:
+        if args.command == "rates":
+            by = [b.strip() for b in args.by.split(",") if b.strip()]
+            unknown = [b for b in by if b not in GROUPS]
+            if unknown:
+                p.error(f"unknown --by {', '.join(unknown)}")
+            rows = history.rates(by=by, **filters)
+            _print_table(by + ["runs", "images", "under_max", "rate"],
+                         [row[:-1] + (f"{row[-1]:.2%}",) for row in rows])
+            return 0
+        if args.command == "runs":
+            header, rows = history.runs(limit=args.limit, **filters)
+        else:
+            header, rows = history.images(image=args.image, verdict=args.verdict, limit=args.limit,
+                                           all_runs=args.all_runs, **filters)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            w.writerows(rows)
+        print(f"{len(rows)} rows written to {args.csv}")
+    else:
+        _print_table(header, rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""One-pass index of the source image folder.
+
+Instead of one os.path.exists()/stat per failed or passed image (a network
+round trip each on a share holding 100k+ BMPs), run_analysis() lists the
+folder once with os.scandir and answers existence checks, sizes and crop
+source paths from that listing. Names match exactly first, then
+case-insensitively (img_001.BMP finds img_001.bmp).
+
+Indexes are cached per folder, in memory and as JSON in the user cache
+directory, and reused while the folder's mtime is unchanged. Adding,
+removing or renaming files changes the folder mtime; rewriting a file in
+place does not, so cached sizes/mtimes can lag behind in that case.
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+
+INDEX_VERSION = 1
+RACY_SECONDS = 2.0  # coarse filesystem clocks: a folder changed this recently may change again unnoticed
+
+_memo = {}  # abspath -> ImageIndex, for repeated runs in one process (GUI)
+
+
+def default_cache_dir():
+    """Per-user cache folder (FF_BLOB_CACHE_DIR overrides it)."""
+    override = os.environ.get("FF_BLOB_CACHE_DIR")
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ff_blob_checker")
+
+
+class ImageIndex:
+    """Regular files of one folder: name -> (size, mtime_ns)."""
+
+    def __init__(self, folder, dir_mtime_ns, entries):
+        self.folder = folder
+        self.dir_mtime_ns = dir_mtime_ns
+        self.entries = entries
+        self._folded = {}
+        for name in entries:
+            self._folded.setdefault(name.lower(), name)
+
+    @classmethod
+    def scan(cls, folder):
+        dir_mtime_ns = os.stat(folder).st_mtime_ns
+        entries = {}
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        st = entry.stat()  # served from the directory listing on Windows
+                        entries[entry.name] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return cls(folder, dir_mtime_ns, entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, name):
+        """Actual file name for name (exact, else case-insensitive), or None."""
+        if name in self.entries:
+            return name
+        return self._folded.get(name.lower())
+
+    def path(self, name):
+        found = self.lookup(name)
+        return os.path.join(self.folder, found) if found is not None else None
+
+    def size(self, name):
+        found = self.lookup(name)
+        return self.entries[found][0] if found is not None else None
+
+    def to_state(self):
+        return {"version": INDEX_VERSION, "folder": self.folder, "dir_mtime_ns": self.dir_mtime_ns,
+                "entries": [[n, s, m] for n, (s, m) in self.entries.items()]}
+
+
+def _cache_path(cache_dir, folder):
+    return os.path.join(cache_dir, "index_" + hashlib.sha1(folder.encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def _load_cached(path, folder, dir_mtime_ns):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            st = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if st.get("version") != INDEX_VERSION or st.get("folder") != folder or st.get("dir_mtime_ns") != dir_mtime_ns:
+        return None
+    return ImageIndex(folder, dir_mtime_ns, {n: (s, m) for n, s, m in st["entries"]})
+
+
+def _save_cached(path, index):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index.to_state(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        pass  # the cache is an optimization only
+
+
+def load_index(folder, cache_dir=None, use_cache=True):
+    """ImageIndex for folder, reused from memory or disk while the folder mtime is unchanged.
+
+    cache_dir defaults to default_cache_dir(). Raises OSError if the folder cannot be listed.
+    """
+    folder = os.path.abspath(folder)
+    if not use_cache:
+        return ImageIndex.scan(folder)
+    dir_mtime_ns = os.stat(folder).st_mtime_ns
+    index = _memo.get(folder)
+    if index is not None and index.dir_mtime_ns == dir_mtime_ns:
+        return index
+    path = _cache_path(cache_dir or default_cache_dir(), folder)
+    index = _load_cached(path, folder, dir_mtime_ns)
+    if index is None:
+        index = ImageIndex.scan(folder)
+        if time.time() - index.dir_mtime_ns / 1e9 > RACY_SECONDS:
+            _save_cached(path, index)
+        else:
+            return index  # too fresh to trust the mtime check; rescan next time
+    _memo[folder] = index
+    return index
@@ -0,0 +1,147 @@
+"""Write-ahead journal for the execute phase, so an interrupted move/copy can resume.
+
+Before any file is touched, run_analysis() appends every planned operation
+(source, destination, source size/mtime) to <csv>.transfer.jsonl next to the
+CSV, then records completions as they come in. Records are buffered and
+appended in batches, and fsynced at most every FSYNC_SECONDS, not per file;
+whatever was lost in the last interval is recovered on resume from the
+destination listing (see ff_transfer's skip of identical destinations).
+
+A journal belongs to one CSV state (path, size, mtime) plus the settings
+that decide where files go. Re-running an interrupted execute phase on the
+same export with the same settings reuses the journal's timestamp, so the
+same failed_<ts>/passed_<ts> folders are filled again: operations journaled
+as done are skipped when their destination is still there with the recorded
+size/mtime, everything else is transferred. A journal marked complete, or
+any other CSV state or settings, starts a new journal (and new folders).
+
+Format: one JSON object per line - a header {"journal", "key", "ts", "mode"},
+then {"intent": [[src, dst, size, mtime_ns], ...]}, {"done": [[dst, action], ...]}
+and finally {"complete": true}. A torn last line (crash mid-write) is ignored.
+"""
+import json
+import os
+import time
+
+JOURNAL_VERSION = 1
+BATCH_RECORDS = 500      # completions buffered before an append
+FLUSH_SECONDS = 1.0      # ... or after this long
+FSYNC_SECONDS = 2.0
+
+
+def journal_path(csv_path):
+    return csv_path + ".transfer.jsonl"
+
+
+def _read_lines(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break  # torn write; nothing after it was fsynced in order
+    return records
+
+
+class TransferJournal:
+    """Append-only journal of one execute phase. See the module docstring."""
+
+    def __init__(self, path, key, ts, mode):
+        self.path = path
+        self.key = key
+        self.ts = ts
+        self.mode = mode
+        self.intents = {}      # dst -> (src, size, mtime_ns)
+        self.done = {}         # dst -> action
+        self.complete = False
+        self.resumed = False
+        self._buffer = []
+        self._file = None
+        self._last_flush = self._last_sync = time.monotonic()
+
+    @classmethod
+    def open(cls, path, key, ts, mode, resume=True):
+        """Journal for key: the unfinished one at path if it matches (resumed=True), else a new one."""
+        records = _read_lines(path) if resume else []
+        head = records[0] if records else {}
+        if head.get("journal") == JOURNAL_VERSION and head.get("key") == key and head.get("mode") == mode:
+            journal = cls(path, key, head["ts"], mode)
+            journal.resumed = True
+            for rec in records[1:]:
+                for src, dst, size, mtime_ns in rec.get("intent", ()):
+                    journal.intents[dst] = (src, size, mtime_ns)
+                for dst, action in rec.get("done", ()):
+                    journal.done[dst] = action
+                if rec.get("complete"):
+                    journal.complete = True
+            if not journal.complete:
+                journal._rewrite()
+                return journal
+        journal = cls(path, key, ts, mode)
+        journal._rewrite()
+        return journal
+
+    def _rewrite(self):
+        """Compact the journal (drops a torn last line, which would swallow the next append)."""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            self._file = f
+            self._append([{"journal": JOURNAL_VERSION, "key": self.key, "ts": self.ts, "mode": self.mode},
+                          {"intent": [[src, dst, size, mtime_ns] for dst, (src, size, mtime_ns) in self.intents.items()]},
+                          {"done": [[dst, action] for dst, action in self.done.items()]}]
+                         + ([{"complete": True}] if self.complete else []), sync=True)
+        os.replace(tmp, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _append(self, records, sync=False):
+        self._file.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        self._file.flush()
+        now = time.monotonic()
+        self._last_flush = now
+        if sync or now - self._last_sync >= FSYNC_SECONDS:
+            os.fsync(self._file.fileno())
+            self._last_sync = now
+
+    def begin(self, jobs):
+        """Log the intended operations (TransferJobs with size/mtime_ns) and fsync before any is started."""
+        intents = []
+        for job in jobs:
+            dst = os.path.join(job.dst_dir, job.name)
+            if dst not in self.intents:
+                self.intents[dst] = (job.src, job.size, job.mtime_ns)
+                intents.append([job.src, dst, job.size, job.mtime_ns])
+        self.complete = False
+        if intents:
+            self._append([{"intent": intents}], sync=True)
+
+    def record(self, dst, action):
+        """Note a finished operation; appended with the next batch."""
+        self.done[dst] = action
+        self._buffer.append([dst, action])
+        if len(self._buffer) >= BATCH_RECORDS or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self, sync=False):
+        if self._buffer:
+            self._append([{"done": self._buffer}], sync=sync)
+            self._buffer = []
+        elif sync:
+            os.fsync(self._file.fileno())
+
+    def close(self, complete=False):
+        """Flush and fsync outstanding records; complete=True marks the execute phase as finished."""
+        if self._file is None:
+            return
+        if complete:
+            self.flush()
+            self._append([{"complete": True}], sync=True)
+            self.complete = True
+        else:
+            self.flush(sync=True)
+        self._file.close()
+        self._file = None
@@ -0,0 +1,111 @@
+"""Per-stage wall time and counters for one analysis run.
+
+run_analysis() records one StageMetrics per stage:
+
+  cache     result-cache lookups that hit (bytes = CSV size hashed for the key)
+  index     files listed in the source images folder (ff_index)
+  parse     rows read from the export (bytes = CSV size)
+  classify  images given a verdict
+  area      blob areas measured
+  crop      crops written (time includes waiting for the crop pool)
+  transfer  files moved/copied (bytes = their size)
+  history   image rows recorded in the run-history database (ff_history)
+  log       analysis log / histogram / metrics files written
+
+In the single-pass Python engine parse, classify, area and crop are
+interleaved per row, so their times are summed per row.
+
+The same numbers go to the results pane (format()), to
+analysis_metrics_<ts>.json next to the analysis log (to_dict()) and to
+analysis_timing_<ts>.csv (TIMING_HEADER, timing_rows()). They are kept out of
+the analysis log, whose rows are all images.
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+TIMING_HEADER = ["Stage", "Seconds", "Unit", "Items", "Bytes"]
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    unit: str = ""
+    seconds: float = 0.0
+    items: int = 0
+    nbytes: int = 0
+
+    @property
+    def rate(self):
+        return self.items / self.seconds if self.seconds > 0 else None
+
+    @property
+    def byte_rate(self):
+        return self.nbytes / self.seconds if self.seconds > 0 and self.nbytes else None
+
+    def describe(self):
+        text = f"{self.seconds:.3f}s, {self.items:,} {self.unit}"
+        if self.rate is not None and self.items:
+            text += f" ({self.rate:,.0f}/s)"
+        if self.nbytes:
+            text += f", {self.nbytes / 1e6:,.1f} MB"
+            if self.byte_rate is not None:
+                text += f" ({self.byte_rate / 1e6:,.1f} MB/s)"
+        return text
+
+
+class RunMetrics:
+    """Ordered collection of StageMetrics plus the total wall time of the run."""
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.total_seconds = 0.0
+
+    def stage(self, name, unit=""):
+        s = self.stages.get(name)
+        if s is None:
+            s = self.stages[name] = StageMetrics(name, unit)
+        return s
+
+    def add(self, name, unit="", seconds=0.0, items=0, nbytes=0):
+        s = self.stage(name, unit)
+        s.seconds += seconds
+        s.items += items
+        s.nbytes += nbytes
+        return s
+
+    @contextmanager
+    def timed(self, name, unit=""):
+        """Add the wall time of the with-block to a stage; yields the StageMetrics for counters."""
+        s = self.stage(name, unit)
+        start = time.perf_counter()
+        try:
+            yield s
+        finally:
+            s.seconds += time.perf_counter() - start
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self._start
+
+    def to_dict(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_seconds": round(self.total_seconds, 6),
+            "stages": [{"stage": s.name, "seconds": round(s.seconds, 6), "items": s.items, "unit": s.unit,
+                        "bytes": s.nbytes, "items_per_s": s.rate and round(s.rate, 1),
+                        "bytes_per_s": s.byte_rate and round(s.byte_rate, 1)}
+                       for s in self.stages.values()],
+        }
+
+    def timing_rows(self):
+        """Rows for TIMING_HEADER, one per stage plus the total."""
+        rows = [[s.name, f"{s.seconds:.3f}", s.unit, s.items, s.nbytes] for s in self.stages.values()]
+        rows.append(["total", f"{self.total_seconds:.3f}", "", "", ""])
+        return rows
+
+    def format(self):
+        lines = [f"  {s.name:9s} {s.describe()}" for s in self.stages.values()]
+        lines.append(f"  {'total':9s} {self.total_seconds:.3f}s")
+        return "\n".join(lines)
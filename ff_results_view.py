@@ -0,0 +1,308 @@
+"""Virtualized results table for the Tk app.
+
+A ttk.Treeview with 100k inserted items takes seconds to fill and keeps
+every row alive as a Tcl object. ResultsTable instead keeps the rows in a
+plain list (ResultsModel) and only ever has as many tree items as fit on
+screen; scrolling, sorting and filtering just re-fill those items from the
+model. Double-clicking a row opens the blob crops written for that image.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+# (heading, width, anchor) per column of an action row [img_name, val, model, kind, action, note]
+COLUMNS = (("Image", 220, "w"), ("BlobNumResults", 110, "e"), ("Model", 80, "w"),
+           ("Category", 110, "w"), ("Action", 80, "w"), ("Note", 200, "w"))
+ALL = "All"
+
+
+def _sort_key(value):
+    # numbers before text, so "BlobNumResults" sorts numerically
+    return (0, value, "") if isinstance(value, (int, float)) else (1, 0, str(value))
+
+
+class ResultsModel:
+    """Action rows plus the filtered, sorted view of them (list of row indices)."""
+
+    def __init__(self):
+        self.rows = []
+        self.view = []
+        self.model = None        # None = all
+        self.category = None
+        self.text = ""
+        self.sort_column = None
+        self.sort_reverse = False
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+        self.apply()
+
+    def extend(self, rows):
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if self.sort_column is None and not self._filtered():
+            self.view.extend(range(start, len(self.rows)))
+        else:
+            self.apply()
+
+    def _filtered(self):
+        return self.model is not None or self.category is not None or self.text
+
+    def apply(self):
+        """Rebuild the view from the current filters and sort order."""
+        rows, model, category, text = self.rows, self.model, self.category, self.text.lower()
+        if self._filtered():
+            self.view = [i for i, r in enumerate(rows)
+                         if (model is None or str(r[2]) == model) and (category is None or r[3] == category)
+                         and (not text or text in r[0].lower())]
+        else:
+            self.view = list(range(len(rows)))
+        if self.sort_column is not None:
+            col = self.sort_column
+            self.view.sort(key=lambda i: _sort_key(rows[i][col]), reverse=self.sort_reverse)
+
+    def sort_by(self, column):
+        """Sort by column; sorting by the same column again reverses the order."""
+        self.sort_reverse = not self.sort_reverse if self.sort_column == column else False
+        self.sort_column = column
+        self.apply()
+
+    def choices(self, column):
+        return sorted({r[column] for r in self.rows}, key=_sort_key)
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, pos):
+        return self.rows[self.view[pos]]
+
+
+class ResultsTable(ttk.Frame):
+    """Filter bar + virtualized Treeview over a ResultsModel."""
+
+    def __init__(self, master, crop_dir=None):
+        super().__init__(master)
+        self.data = ResultsModel()
+        self.crop_dir = crop_dir
+        self.top = 0             # view position shown in the first tree row
+        self.visible = 1
+        self.selected = None     # row index (into data.rows) of the selection
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x")
+        self.model_var = tk.StringVar(value=ALL)
+        self.category_var = tk.StringVar(value=ALL)
+        self.text_var = tk.StringVar()
+        self.count_var = tk.StringVar()
+        ttk.Label(bar, text="Model:").pack(side="left", padx=(0, 4))
+        self.model_box = ttk.Combobox(bar, textvariable=self.model_var, width=10, state="readonly", values=[ALL])
+        self.model_box.pack(side="left")
+        ttk.Label(bar, text="Category:").pack(side="left", padx=(12, 4))
+        self.category_box = ttk.Combobox(bar, textvariable=self.category_var, width=14, state="readonly", values=[ALL])
+        self.category_box.pack(side="left")
+        ttk.Label(bar, text="Image contains:").pack(side="left", padx=(12, 4))
+        ttk.Entry(bar, textvariable=self.text_var, width=20).pack(side="left")
+        ttk.Label(bar, textvariable=self.count_var).pack(side="right")
+        for box in (self.model_box, self.category_box):
+            box.bind("<<ComboboxSelected>>", lambda e: self._filter())
+        self.text_var.trace_add("write", lambda *a: self._filter())
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True, pady=(4, 0))
+        body.pack_propagate(False)  # the tree follows the frame's size (_on_resize), not the other way round
+        self.tree = ttk.Treeview(body, columns=[c[0] for c in COLUMNS], show="headings", selectmode="browse", height=1)
+        for i, (name, width, anchor) in enumerate(COLUMNS):
+            self.tree.heading(name, text=name, command=lambda i=i: self._sort(i))
+            self.tree.column(name, width=width, anchor=anchor, stretch=(i in (0, 5)))
+        self.scroll = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        body.bind("<Configure>", self._on_resize)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self._on_wheel)
+        for seq, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "page-"), ("<Next>", "page+"),
+                          ("<Home>", "home"), ("<End>", "end")):
+            self.tree.bind(seq, lambda e, step=step: self._on_key(step))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<Return>", lambda e: self._open_selected())
+        self._render()
+
+    # -- data ----------------------------------------------------------------
+
+    def set_rows(self, rows, crop_dir=None):
+        """Show rows (lists [img_name, val, model, kind, action, note]); filters and sort order are kept."""
+        self.crop_dir = crop_dir
+        self.data.set_rows(rows)
+        self._refresh_choices()
+        self._render()
+
+    def append_rows(self, rows):
+        """Add rows while a run is streaming in and redraw (filter choices are updated by set_rows)."""
+        self.data.extend(rows)
+        self._render()
+
+    def clear(self):
+        self.set_rows([])
+
+    def _refresh_choices(self):
+        self.model_box.configure(values=[ALL] + [str(m) for m in self.data.choices(2)])
+        self.category_box.configure(values=[ALL] + [str(c) for c in self.data.choices(3)])
+
+    def _filter(self):
+        model, category = self.model_var.get(), self.category_var.get()
+        self.data.model = None if model == ALL else model
+        self.data.category = None if category == ALL else category
+        self.data.text = self.text_var.get().strip()
+        self.data.apply()
+        self.top = 0
+        self._render()
+
+    def _sort(self, column):
+        self.data.sort_by(column)
+        for i, (name, _, _) in enumerate(COLUMNS):
+            arrow = (" ▼" if self.data.sort_reverse else " ▲") if i == column else ""
+            self.tree.heading(name, text=name + arrow)
+        self.top = 0
+        self._render()
+
+    # -- rendering -------------------------------------------------------------
+
+    def _render(self):
+        """Re-fill the tree items from the view window starting at self.top."""
+        total = len(self.data)
+        self.top = max(0, min(self.top, total - self.visible))
+        shown = min(self.visible, total - self.top)
+        items = self.tree.get_children()
+        for iid in items[shown:]:
+            self.tree.delete(iid)
+        select = None
+        for k in range(shown):
+            index = self.data.view[self.top + k]
+            values = ["" if v is None else v for v in self.data.rows[index]]
+            if k < len(items):
+                self.tree.item(items[k], values=values)
+                iid = items[k]
+            else:
+                iid = self.tree.insert("", "end", iid=str(k), values=values)
+            if index == self.selected:
+                select = iid
+        if select is not None:
+            self.tree.selection_set(select)
+        else:
+            self.tree.selection_remove(self.tree.selection())
+        if total:
+            self.scroll.set(self.top / total, (self.top + shown) / total)
+        else:
+            self.scroll.set(0, 1)
+        self.count_var.set(f"{total:,} of {len(self.data.rows):,} images")
+
+    def _on_resize(self, event):
+        style = ttk.Style(self)
+        row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        heading = 24
+        visible = max(1, (event.height - heading) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.tree.configure(height=visible)
+            self._render()
+
+    def _scroll_to(self, top):
+        self.top = top
+        self._render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.data)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible if args[2] == "pages" else 1)
+            self._scroll_to(self.top + step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self._scroll_to(self.top - 3)
+        else:
+            self._scroll_to(self.top + 3)
+        return "break"
+
+    # -- selection -------------------------------------------------------------
+
+    def _position(self):
+        """View position of the selected row, or None."""
+        if self.selected is None:
+            return None
+        try:
+            return self.data.view.index(self.selected)
+        except ValueError:
+            return None
+
+    def _on_key(self, step):
+        total = len(self.data)
+        if not total:
+            return "break"
+        pos = self._position()
+        if pos is None:
+            pos = self.top - 1 if step != "end" else total
+        if step == "page-":
+            pos -= self.visible
+        elif step == "page+":
+            pos += self.visible
+        elif step == "home":
+            pos = 0
+        elif step == "end":
+            pos = total - 1
+        else:
+            pos += step
+        pos = max(0, min(pos, total - 1))
+        self.selected = self.data.view[pos]
+        if pos < self.top:
+            self.top = pos
+        elif pos >= self.top + self.visible:
+            self.top = pos - self.visible + 1
+        self._render()
+        return "break"
+
+    def _on_select(self, event):
+        sel = self.tree.selection()
+        if sel:
+            self.selected = self.data.view[self.top + self.tree.index(sel[0])]
+
+    def _on_double_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid:
+            self.selected = self.data.view[self.top + self.tree.index(iid)]
+            self._open_selected()
+
+    def _open_selected(self):
+        if self.selected is not None:
+            show_crops(self, self.data.rows[self.selected], self.crop_dir)
+
+
+def show_crops(master, row, crop_dir):
+    """Window with the blob crops of one result row."""
+    from ff_analysis import find_crops
+
+    img_name = row[0]
+    win = tk.Toplevel(master)
+    win.title(f"Blob crops - {img_name}")
+    crops = find_crops(crop_dir, img_name) if crop_dir else []
+    if not crops:
+        reason = "Crops were not extracted in this run." if not crop_dir else f"No crops found in {crop_dir}."
+        ttk.Label(win, text=reason, padding=12).pack()
+        return win
+    from PIL import Image, ImageTk
+
+    frame = ttk.Frame(win, padding=8)
+    frame.pack(fill="both", expand=True)
+    win.images = []  # PhotoImages must stay referenced while shown
+    for col, (model, i, path) in enumerate(crops):
+        try:
+            with Image.open(path) as img:
+                photo = ImageTk.PhotoImage(img.copy())
+        except OSError as e:
+            ttk.Label(frame, text=f"{path}\n{e}").grid(row=0, column=col, padx=4)
+            continue
+        win.images.append(photo)
+        ttk.Label(frame, image=photo).grid(row=0, column=col, padx=4)
+        ttk.Label(frame, text=f"blob {i + 1}, model {model}").grid(row=1, column=col, padx=4)
+    return win
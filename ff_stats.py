@@ -0,0 +1,357 @@
+"""Blob-area statistics for one analysis run.
+
+AreaStats keeps one series per blob ModelNumber (plus an overall series) and
+reports count, mean, stddev, min, max, p1/p5/p50/p95/p99 and a fixed-width
+histogram for picking area thresholds.
+
+In "exact" mode every area is kept in a compact array('i') (4 bytes per blob)
+and everything is computed once at the end (with NumPy when installed). In "streaming" mode
+the quantiles come from P² estimators (Jain & Chlamtac, 1985), so memory stays
+constant for unbounded runs such as follow mode; mean/stddev (Welford),
+min/max and the histogram are exact in both modes.
+"""
+import math
+from array import array
+from dataclasses import dataclass
+
+_np = False  # numpy module, None if not installed; False until first needed (it costs ~80 ms to import)
+
+
+def _numpy():
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:  # optional; speeds up the exact summary
+            numpy = None
+        _np = numpy
+    return _np
+
+QUANTILES = (0.01, 0.05, 0.50, 0.95, 0.99)
+DEFAULT_BIN_WIDTH = 50
+
+
+@dataclass
+class AreaSummary:
+    count: int
+    mean: float
+    std: float
+    min: int
+    max: int
+    p1: float
+    p5: float
+    p50: float
+    p95: float
+    p99: float
+
+    def describe(self):
+        return (f"n={self.count} mean={self.mean:.1f} std={self.std:.1f} min={self.min} "
+                f"p1={self.p1:g} p5={self.p5:g} p50={self.p50:g} p95={self.p95:g} p99={self.p99:g} max={self.max}")
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with five markers (P² algorithm)."""
+
+    def __init__(self, p):
+        self.p = p
+        self.q = []                                    # marker heights (first 5 raw values until full)
+        self.n = [0, 1, 2, 3, 4]                       # marker positions
+        self.np = [0, 2 * p, 4 * p, 2 + 2 * p, 4]      # desired positions
+        self.dn = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.q
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n, np_, dn = self.n, self.np, self.dn
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            np_[i] += dn[i]
+        for i in (1, 2, 3):
+            d = np_[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self):
+        if len(self.q) < 5:
+            return _exact_quantile(sorted(self.q), self.p)
+        return self.q[2]
+
+    def to_state(self):
+        return [self.q, self.n, self.np]
+
+    @classmethod
+    def from_state(cls, p, state):
+        est = cls(p)
+        est.q, est.n, est.np = (list(v) for v in state)
+        return est
+
+
+def _exact_quantile(sorted_vals, p):
+    """Linear-interpolation quantile (numpy's default), so p50 equals statistics.median."""
+    if not sorted_vals:
+        return float("nan")
+    pos = (len(sorted_vals) - 1) * p
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+
+
+def _exact_summary(values, bin_width):
+    """(AreaSummary, histogram dict) from an array('i'), with NumPy when it is installed.
+
+    Sums are taken as Python ints, so mean/stddev do not depend on the order values were added.
+    """
+    n = len(values)
+    np = _numpy()
+    if np is not None:
+        arr = np.sort(np.frombuffer(values, dtype=np.intc))
+        wide = arr.astype(np.int64)
+        total = int(wide.sum())
+        squares = sum(int(np.dot(part, part)) for part in np.array_split(wide, max(1, n // 100_000)))
+        vals = arr
+        bins, counts = np.unique(wide // bin_width, return_counts=True)
+        hist = dict(zip(bins.tolist(), counts.tolist()))
+    else:
+        vals = sorted(values)
+        total = sum(vals)
+        squares = sum(v * v for v in vals)
+        hist = {}
+        for v in vals:
+            b = v // bin_width
+            hist[b] = hist.get(b, 0) + 1
+    qs = []
+    for p in QUANTILES:
+        pos = (n - 1) * p
+        lo = int(pos)
+        hi = min(lo + 1, n - 1)
+        qs.append(int(vals[lo]) + (int(vals[hi]) - int(vals[lo])) * (pos - lo))
+    std = math.sqrt((squares * n - total * total) / (n * (n - 1))) if n > 1 else 0.0
+    return AreaSummary(n, total / n, std, int(vals[0]), int(vals[-1]), *qs), hist
+
+
+class _StreamSeries:
+    """Constant-memory series: Welford moments, min/max, histogram and P² quantiles."""
+    __slots__ = ("count", "mean", "m2", "min", "max", "hist", "estimators")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.hist = {}
+        self.estimators = [P2Quantile(p) for p in QUANTILES]
+
+    def add(self, area, bin_width):
+        self.count += 1
+        delta = area - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (area - self.mean)
+        if self.min is None or area < self.min:
+            self.min = area
+        if self.max is None or area > self.max:
+            self.max = area
+        b = area // bin_width
+        self.hist[b] = self.hist.get(b, 0) + 1
+        for est in self.estimators:
+            est.add(area)
+
+    def summary(self):
+        if not self.count:
+            return None
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+        qs = [est.value() for est in self.estimators]
+        return AreaSummary(self.count, self.mean, std, self.min, self.max, *qs)
+
+    def to_state(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+                "hist": [[b, c] for b, c in self.hist.items()],
+                "est": [e.to_state() for e in self.estimators]}
+
+    @classmethod
+    def from_state(cls, st):
+        s = cls()
+        s.count, s.mean, s.m2, s.min, s.max = st["count"], st["mean"], st["m2"], st["min"], st["max"]
+        s.hist = {b: c for b, c in st["hist"]}
+        s.estimators = [P2Quantile.from_state(p, e) for p, e in zip(QUANTILES, st["est"])]
+        return s
+
+
+class AreaStats:
+    """Per-model and overall blob-area statistics; one instance per run.
+
+    Args:
+        exact: keep every area (array('i')) for exact quantiles; False uses P² estimators.
+        bin_width: histogram bin width in px.
+    """
+
+    def __init__(self, exact=True, bin_width=DEFAULT_BIN_WIDTH):
+        self.exact = exact
+        self.bin_width = max(int(bin_width), 1)
+        self.values = {}     # exact: model -> array('i'); the overall series is their union
+        self.overall = None if exact else _StreamSeries()
+        self.models = {}     # streaming: model -> _StreamSeries
+        self._cache = None
+
+    def add(self, area, model=""):
+        if self.exact:
+            vals = self.values.get(model)
+            if vals is None:
+                vals = self.values[model] = array("i")
+            vals.append(area)
+            self._cache = None
+            return
+        self.overall.add(area, self.bin_width)
+        s = self.models.get(model)
+        if s is None:
+            s = self.models[model] = _StreamSeries()
+        s.add(area, self.bin_width)
+
+    def add_many(self, values, model=""):
+        """Add a batch of areas for one model. Order only matters for streaming quantiles."""
+        if not self.exact:
+            for v in values:
+                self.add(int(v), model)
+            return
+        vals = self.values.get(model)
+        if vals is None:
+            vals = self.values[model] = array("i")
+        if not isinstance(values, array):
+            values = array("i", values)
+        vals.extend(values)
+        self._cache = None
+
+    def __len__(self):
+        if self.exact:
+            return sum(len(v) for v in self.values.values())
+        return self.overall.count
+
+    def _exact(self):
+        """{model or None: (AreaSummary, hist)}, computed once per batch of additions."""
+        if self._cache is None:
+            cache = {}
+            for model, vals in self.values.items():
+                if vals:
+                    cache[model] = _exact_summary(vals, self.bin_width)
+            everything = array("i")
+            for model in sorted(self.values):
+                everything.extend(self.values[model])
+            if everything:
+                cache[None] = _exact_summary(everything, self.bin_width)
+            self._cache = cache
+        return self._cache
+
+    def summary(self):
+        """AreaSummary over all blobs, or None when no areas were seen."""
+        if self.exact:
+            return self._exact().get(None, (None, None))[0]
+        return self.overall.summary()
+
+    def by_model(self):
+        """{model number: AreaSummary}, sorted by model number."""
+        if self.exact:
+            cache = self._exact()
+            return {m: cache[m][0] for m in sorted(self.values) if m in cache}
+        return {m: self.models[m].summary() for m in sorted(self.models)}
+
+    def histogram(self, model=None):
+        """[(bin_start, count), ...] in ascending order, over all blobs or one model."""
+        if self.exact:
+            entry = self._exact().get(model)
+            hist = entry[1] if entry else {}
+        else:
+            series = self.overall if model is None else self.models.get(model)
+            hist = series.hist if series else {}
+        return [(b * self.bin_width, hist[b]) for b in sorted(hist)]
+
+    def to_state(self):
+        """JSON-friendly snapshot; meant for streaming mode (exact mode stores every value)."""
+        state = {"exact": self.exact, "bin_width": self.bin_width}
+        if self.exact:
+            state["values"] = {m: v.tolist() for m, v in self.values.items()}
+        else:
+            state["overall"] = self.overall.to_state()
+            state["models"] = {m: s.to_state() for m, s in self.models.items()}
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls(state["exact"], state["bin_width"])
+        if stats.exact:
+            stats.values = {m: array("i", v) for m, v in state["values"].items()}
+        else:
+            stats.overall = _StreamSeries.from_state(state["overall"])
+            stats.models = {m: _StreamSeries.from_state(st) for m, st in state["models"].items()}
+        return stats
+
+
+def merge_summaries(parts):
+    """Combine (AreaSummary, histogram, bin_width) of several runs into (AreaSummary, histogram, bin_width).
+
+    count, mean, stddev, min and max are exact; the quantiles are read off the merged
+    histogram (linear within a bin), so they are accurate to one bin width. Histograms
+    with different bin widths are re-binned to the widest one. Returns (None, [], width)
+    when no part has areas.
+    """
+    parts = [p for p in parts if p[0] is not None and p[0].count]
+    width = max((w for _, _, w in parts), default=DEFAULT_BIN_WIDTH)
+    if not parts:
+        return None, [], width
+    n = sum(s.count for s, _, _ in parts)
+    mean = sum(s.count * s.mean for s, _, _ in parts) / n
+    squares = sum((s.count - 1) * s.std ** 2 + s.count * s.mean ** 2 for s, _, _ in parts)
+    std = math.sqrt(max(squares - n * mean * mean, 0.0) / (n - 1)) if n > 1 else 0.0
+    lo, hi = min(s.min for s, _, _ in parts), max(s.max for s, _, _ in parts)
+    merged = {}
+    for _, hist, _ in parts:
+        for start, count in hist:
+            b = start // width * width
+            merged[b] = merged.get(b, 0) + count
+    hist = sorted(merged.items())
+    total = sum(c for _, c in hist)
+    qs = []
+    for p in QUANTILES:
+        pos = (total - 1) * p
+        seen = 0
+        for start, count in hist:
+            if seen + count > pos:
+                qs.append(min(max(start + (pos - seen + 0.5) / count * width, lo), hi))
+                break
+            seen += count
+        else:
+            qs.append(float("nan"))
+    return AreaSummary(n, mean, std, lo, hi, *qs), hist, width
+
+
+def format_histogram(hist, bin_width, width=40):
+    """Text bar chart of histogram() output."""
+    if not hist:
+        return ""
+    peak = max(c for _, c in hist)
+    lines = []
+    for start, count in hist:
+        bar = "#" * max(1, round(count / peak * width))
+        lines.append(f"  {f'{start}-{start + bin_width - 1}':>11} {count:8d} {bar}")
+    return "\n".join(lines) + "\n"
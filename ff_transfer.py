@@ -0,0 +1,113 @@
+"""Parallel move/copy of image files for the execute phase.
+
+Used by ff_analysis.run_analysis() for both failed and passed images. Work is
+spread over a bounded thread pool (file I/O releases the GIL, and on network
+shares the time is dominated by round trips), every destination directory is
+created once up front, and moves are done with a rename when source and
+destination share a filesystem.
+
+Each destination folder is listed once, and a job whose destination already
+holds a file of the same size and mtime (left by an earlier, interrupted run)
+is skipped instead of being copied again; for a move the source is removed.
+Without overwrite (folders that are not timestamped, such as the batch
+aggregate tree) a different file already at the destination is left alone
+and the job is skipped, like `mv -n`; the source stays where it is.
+"""
+import os
+import shutil
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ff_index import ImageIndex
+
+DEFAULT_WORKERS = 8
+MTIME_SLACK_NS = 2_000_000_000  # FAT and some SMB servers keep mtimes in 2 s steps
+
+# size/mtime_ns of the source, when known (from ff_index), enable the identical-destination skip
+TransferJob = namedtuple("TransferJob", "src dst_dir name size mtime_ns", defaults=(None, None))
+
+
+def _move(src, dst):
+    try:
+        os.replace(src, dst)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # different device (or a share that refuses rename): copy then delete, like shutil.move
+        shutil.copy2(src, dst)
+        os.remove(src)
+
+
+def same_file(existing, size, mtime_ns):
+    """True if a destination listed as (size, mtime_ns) is a finished copy of a source with size/mtime_ns."""
+    return (existing is not None and size is not None and existing[0] == size
+            and abs(existing[1] - mtime_ns) <= MTIME_SLACK_NS)
+
+
+def _transfer_one(job, mode, cancel, existing=None, overwrite=True):
+    """Return (action, note) for one job; never raises."""
+    if cancel is not None and cancel.is_set():
+        return None
+    dst = os.path.join(job.dst_dir, job.name)
+    try:
+        if same_file(existing, job.size, job.mtime_ns):
+            if mode == "move":
+                os.remove(job.src)
+            return "skipped", "already-at-destination"
+        if not overwrite and (existing is not None or os.path.exists(dst)):
+            return "skipped", "different-file-at-destination"
+        if mode == "move":
+            _move(job.src, dst)
+            return "moved", ""
+        shutil.copy2(job.src, dst)
+        return "copied", ""
+    except FileNotFoundError:
+        if not os.path.exists(job.src):
+            return "missing", "source-missing"
+        return "error", f"destination not writable: {dst}"
+    except Exception as e:
+        return "error", str(e)
+
+
+def transfer_files(jobs, mode="move", workers=DEFAULT_WORKERS, progress=None, cancel=None, skip_existing=True,
+                   overwrite=True):
+    """Move or copy every TransferJob and return a list of (action, note), one per job, in job order.
+
+    mode is "move" or "copy". With skip_existing, jobs that carry the source size/mtime_ns and whose
+    destination already matches them come back as ("skipped", "already-at-destination"). Without
+    overwrite, jobs whose destination holds any other file come back as ("skipped",
+    "different-file-at-destination") and are not transferred. progress, if given, is called as
+    progress(done, total, index, outcome) from the calling thread as files complete. If cancel (an object with is_set()) becomes set,
+    jobs that have not started yet are skipped and their outcome is None.
+    """
+    jobs = list(jobs)
+    outcomes = [None] * len(jobs)
+    present = {}
+    for d in {job.dst_dir for job in jobs}:
+        os.makedirs(d, exist_ok=True)
+        if skip_existing or not overwrite:
+            present[d] = ImageIndex.scan(d).entries
+    existing = [present.get(job.dst_dir, {}).get(job.name) for job in jobs]
+
+    workers = max(1, int(workers or 1))
+    if workers == 1:
+        for i, job in enumerate(jobs):
+            outcomes[i] = _transfer_one(job, mode, cancel, existing[i], overwrite)
+            if outcomes[i] is None:
+                break
+            if progress:
+                progress(i + 1, len(jobs), i, outcomes[i])
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_transfer_one, job, mode, cancel, existing[i], overwrite): i for i, job in enumerate(jobs)}
+        done = 0
+        for fut in as_completed(futures):
+            i = futures[fut]
+            outcomes[i] = fut.result()
+            if outcomes[i] is None:
+                continue
+            done += 1
+            if progress:
+                progress(done, len(jobs), i, outcomes[i])
+    return outcomes
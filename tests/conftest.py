@@ -0,0 +1,9 @@
+"""Checks for the riskiest parts of the pipeline; run with `python -m pytest tests`.
+
+The modules live at the repository root and the fixture writers in benchmarks/synth.py.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
@@ -0,0 +1,58 @@
+"""BmpRegionReader must cut exactly the pixels PIL does."""
+import os
+
+import pytest
+from PIL import Image
+
+from crop import BmpRegionReader, crop_many
+from synth import write_bmp
+
+# inside, hanging off every edge, and entirely outside the frame
+BOXES = [(10, 10, 160, 210), (-20, -30, 130, 170), (90, 60, 260, 260), (0, 0, 251, 203),
+         (240, 190, 300, 250), (300, 300, 350, 350)]
+
+
+def _pixels(img):
+    return img.size, img.convert("RGB").tobytes()
+
+
+@pytest.mark.parametrize("bpp", [8, 24, 32])
+@pytest.mark.parametrize("width", [251, 252, 253, 254])  # every row-padding remainder
+@pytest.mark.parametrize("top_down", [False, True])
+def test_regions_match_pil(tmp_path, bpp, width, top_down):
+    src = str(tmp_path / "frame.bmp")
+    write_bmp(src, width, 203, bpp, top_down=top_down, seed=bpp + width)
+    with BmpRegionReader(src) as reader, Image.open(src) as img:
+        for i, box in enumerate(BOXES):
+            out = str(tmp_path / f"crop_{i}.bmp")
+            reader.save_region(box, out)
+            with Image.open(out) as got:
+                assert _pixels(got) == _pixels(img.crop(box)), box
+
+
+def test_8bit_crop_keeps_the_palette(tmp_path):
+    src = str(tmp_path / "frame.bmp")
+    write_bmp(src, 64, 48, 8)
+    out = str(tmp_path / "crop.bmp")
+    with BmpRegionReader(src) as reader:
+        reader.save_region((5, 5, 37, 29), out)
+    with Image.open(out) as got, Image.open(src) as img:
+        assert got.mode == img.mode
+        assert got.getpalette() == img.getpalette()
+
+
+def test_crop_many_matches_pil(tmp_path):
+    src = str(tmp_path / "frame.bmp")
+    write_bmp(src, 251, 203, 24)
+    crops = [(str(tmp_path / f"{i}_frame.bmp"), box) for i, box in enumerate(BOXES[:4])]
+    assert crop_many(src, crops) == len(crops)
+    with Image.open(src) as img:
+        for out, box in crops:
+            with Image.open(out) as got:
+                assert _pixels(got) == _pixels(img.crop(box))
+
+
+def test_missing_source_writes_nothing(tmp_path):
+    out = str(tmp_path / "0_missing.bmp")
+    assert crop_many(str(tmp_path / "missing.bmp"), [(out, (0, 0, 10, 10))]) == 0
+    assert not os.path.exists(out)
@@ -0,0 +1,121 @@
+"""Resuming an interrupted execute phase (ff_journal + run_analysis)."""
+import glob
+import os
+import shutil
+import threading
+
+import pytest
+
+from ff_analysis import AnalysisOptions, run_analysis
+from ff_journal import TransferJournal, journal_path
+from ff_transfer import TransferJob
+from synth import write_export, write_frames
+
+
+def _jobs(tmp_path, n):
+    return [TransferJob(str(tmp_path / f"src_{i}.bmp"), str(tmp_path / "dst"), f"src_{i}.bmp", 100 + i, 1_000 + i)
+            for i in range(n)]
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "x.csv.transfer.jsonl")
+    journal = TransferJournal.open(path, "key", "20260101_000000", "copy")
+    jobs = _jobs(tmp_path, 3)
+    journal.begin(jobs)
+    journal.record(os.path.join(jobs[0].dst_dir, jobs[0].name), "copied")
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"done":[["half-writ')  # crash in the middle of an append
+
+    journal = TransferJournal.open(path, "key", "20260202_000000", "copy")
+    assert journal.resumed and journal.ts == "20260101_000000"
+    assert len(journal.intents) == 3 and list(journal.done) == [os.path.join(jobs[0].dst_dir, jobs[0].name)]
+    # the torn line must not swallow what is appended after it
+    journal.record(os.path.join(jobs[1].dst_dir, jobs[1].name), "copied")
+    journal.close()
+    journal = TransferJournal.open(path, "key", "20260303_000000", "copy")
+    assert len(journal.done) == 2
+    journal.close()
+
+
+def test_other_key_or_mode_starts_fresh(tmp_path):
+    path = str(tmp_path / "x.csv.transfer.jsonl")
+    journal = TransferJournal.open(path, "key", "20260101_000000", "copy")
+    journal.begin(_jobs(tmp_path, 2))
+    journal.close()
+    for key, mode in (("other", "copy"), ("key", "move")):
+        journal = TransferJournal.open(path, key, "20260202_000000", mode)
+        assert not journal.resumed and journal.ts == "20260202_000000" and not journal.intents
+        journal.close()
+
+
+def test_complete_journal_is_not_resumed(tmp_path):
+    path = str(tmp_path / "x.csv.transfer.jsonl")
+    journal = TransferJournal.open(path, "key", "20260101_000000", "copy")
+    journal.begin(_jobs(tmp_path, 2))
+    journal.close(complete=True)
+    journal = TransferJournal.open(path, "key", "20260202_000000", "copy")
+    assert not journal.resumed and journal.ts == "20260202_000000"
+    journal.close()
+
+
+@pytest.fixture
+def export(tmp_path):
+    """An export in tmp/csv with its (tiny) frames one folder up, as the defaults expect."""
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    path = str(csv_dir / "FastForward_N123_cam1.csv")
+    images = write_export(path, 400, fail_rate=0.5)
+    write_frames(str(tmp_path), images, width=32, height=16, distinct=2)
+    return path
+
+
+def _run(path, mode, stop_after=None):
+    """run_analysis with execute; with stop_after, cancel once that many files were handled."""
+    cancel = threading.Event()
+
+    def progress(stage, done, total=None, item=None):
+        if stop_after is not None and stage == "transfer" and done >= stop_after:
+            cancel.set()
+
+    opts = AnalysisOptions(path, execute=True, action_mode=mode, extract_crops=False, transfer_workers=1,
+                           result_cache=False, history=False)
+    return run_analysis(opts, progress=progress, cancel=cancel)
+
+
+def _failed_dirs(path):
+    return glob.glob(os.path.join(os.path.dirname(path), "failed_*"))
+
+
+@pytest.mark.parametrize("mode", ["copy", "move"])
+def test_interrupted_run_resumes_into_the_same_folder(export, mode):
+    first = _run(export, mode, stop_after=10)
+    assert first.cancelled and first.moved_count == 10
+    total = len(first.failed)
+
+    second = _run(export, mode)
+    assert not second.cancelled and second.resumed_ts is not None
+    assert second.moved_count == total - 10 and second.skipped_count == 10
+    [folder] = _failed_dirs(export)
+    assert folder.endswith(second.resumed_ts) and len(os.listdir(folder)) == total
+    if mode == "move":
+        src_dir = os.path.dirname(os.path.dirname(export))
+        assert not any(os.path.exists(os.path.join(src_dir, img)) for img, _, _ in second.failed)
+
+
+def test_deleted_destination_is_transferred_again(export):
+    first = _run(export, "copy", stop_after=10)
+    for folder in _failed_dirs(export):
+        shutil.rmtree(folder)
+    second = _run(export, "copy")
+    assert second.resumed_ts is not None
+    assert second.moved_count == len(first.failed) and second.skipped_count == 0
+
+
+def test_finished_run_is_not_resumed(export):
+    first = _run(export, "copy")
+    assert not first.cancelled and os.path.exists(journal_path(export))
+    for folder in _failed_dirs(export):  # collected elsewhere, e.g. by collect_failed.sh
+        shutil.rmtree(folder)
+    second = _run(export, "copy")
+    assert second.resumed_ts is None and second.moved_count == len(second.failed)